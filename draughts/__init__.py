@@ -0,0 +1,4 @@
+# the rules engine can be imported on its own; the window lives in draughts.gui and is started by running the package
+
+from .board import Board, Geometry, Piece
+from .move import Move
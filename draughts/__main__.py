@@ -0,0 +1,5 @@
+# python -m draughts starts the game
+
+from .gui import main
+
+main()
@@ -0,0 +1,141 @@
+# scores lots of positions at once with numpy, for making training data and tuning the engine
+# this is the only part of the package that needs numpy, so nothing else imports it
+
+import numpy as np
+
+from .board import Geometry
+from .search import KING, MAN
+
+MAN_VALUE = 1 # the values in a batch are team * (1 for a man or 2 for a king), the same as a Piece's team and majesty
+KING_VALUE = 2
+
+
+class Tables: # the same geometry findValidMoves uses, as numpy index arrays
+    """neighbour, jump and row tables for one board size"""
+    _cache = {}
+
+    @classmethod
+    def get(cls, size):
+        key = (size[0], size[1])
+        if key not in cls._cache:
+            cls._cache[key] = cls(Geometry.get(key))
+        return cls._cache[key]
+
+    def __init__(self, geometry):
+        self.geometry = geometry
+        squares = geometry.squares
+        # neighbours[i, d] is the square next to i in direction d, with squares (the extra column) for off the board
+        self.neighbours = np.array([[n if n >= 0 else squares for n in row] for row in geometry.neighbours], dtype=np.intp)
+        self.jumps = np.array([[j if j >= 0 else squares for j in row] for row in geometry.jumps], dtype=np.intp)
+        rows = np.arange(squares) // geometry.width
+        self.whiteAdvance = (geometry.size[1] - 1 - rows).astype(np.int32) # how far a white man has come from its back row
+        self.blackAdvance = rows.astype(np.int32)
+        self.forwards = {1: list(geometry.forwards[1]), -1: list(geometry.forwards[-1])}
+
+class Batch:
+    """many positions of one board size, as an (N, squares) int8 array of piece values and an (N,) array of whose turn it is"""
+    def __init__(self, size, squares, teams):
+        self.size = (size[0], size[1])
+        self.tables = Tables.get(size)
+        self.squares = np.asarray(squares, dtype=np.int8)
+        self.teams = np.asarray(teams, dtype=np.int8)
+        if self.squares.shape != (len(self.teams), self.tables.geometry.squares):
+            raise ValueError(f"expected {len(self.teams)} rows of {self.tables.geometry.squares} squares, got {self.squares.shape}")
+
+    @classmethod
+    def fromBoards(cls, boards): # this goes straight from the bitboards, which is much quicker than making every Piece
+        """returns a batch of the positions on a list of boards, which must all be the same size"""
+        boards = list(boards)
+        if not boards:
+            raise ValueError("a batch needs at least one board")
+        size = boards[0].size
+        return cls.fromBitboards(size, [b.white for b in boards], [b.black for b in boards], [b.kings for b in boards], [b.currentTeam for b in boards])
+
+    @classmethod
+    def fromBitboards(cls, size, white, black, kings, teams):
+        """returns a batch from lists of white, black and kings bitboards and teams to move"""
+        geometry = Geometry.get(size)
+        count = geometry.squares
+        length = (count + 7) // 8
+        def unpack(masks): # every mask becomes a row of 0s and 1s, all in one go
+            data = np.frombuffer(b"".join(mask.to_bytes(length, "little") for mask in masks), dtype=np.uint8)
+            return np.unpackbits(data.reshape(-1, length), axis=1, count=count, bitorder="little").astype(np.int8)
+        kingBits = unpack(kings)
+        values = MAN_VALUE + (KING_VALUE - MAN_VALUE) * kingBits
+        squares = unpack(white) * values - unpack(black) * values
+        return cls(size, squares, teams)
+
+    def __len__(self):
+        return len(self.teams)
+
+    def planes(self): # the same position as a few true/false arrays with a row per square (so picking out neighbours copies whole rows), and an extra row for off the board
+        squares = np.ascontiguousarray(self.squares.T)
+        offBoard = np.zeros((1, len(self)), dtype=bool)
+        empty = np.concatenate([squares == 0, offBoard]) # you can't land off the board
+        pieces = {team: np.concatenate([squares * team > 0, offBoard]) for team in (1, -1)}
+        kings = {team: squares == team * KING_VALUE for team in (1, -1)}
+        return empty, pieces, kings
+
+    def material(self):
+        """returns an (N, 4) array of white men, white kings, black men and black kings"""
+        squares = self.squares
+        return np.stack([
+            (squares == MAN_VALUE).sum(axis=1),
+            (squares == KING_VALUE).sum(axis=1),
+            (squares == -MAN_VALUE).sum(axis=1),
+            (squares == -KING_VALUE).sum(axis=1),
+        ], axis=1).astype(np.int32)
+
+    def advancement(self):
+        """returns an (N, 2) array of how many rows white's and black's men have moved forward in total"""
+        white = (self.squares == MAN_VALUE) @ self.tables.whiteAdvance
+        black = (self.squares == -MAN_VALUE) @ self.tables.blackAdvance
+        return np.stack([white, black], axis=1).astype(np.int32)
+
+    def steps(self, planes=None): # the same steps findValidMoves finds when nobody can take anything
+        """returns an (N, 2) array of how many simple steps white and black could make"""
+        empty, pieces, kings = planes or self.planes()
+        tables = self.tables
+        counts = []
+        for team in (1, -1):
+            total = np.zeros(kings[team].shape, dtype=np.uint8) # adding up per square and summing once at the end is much quicker
+            for d in range(4):
+                movers = pieces[team][:-1] if d in tables.forwards[team] else kings[team] # only kings can go backwards
+                total += movers & empty[tables.neighbours[:, d]]
+            counts.append(total.sum(axis=0, dtype=np.int32))
+        return np.stack(counts, axis=1)
+
+    def jumps(self, planes=None):
+        """returns an (N, 2) array of how many single jumps white and black could start with"""
+        empty, pieces, kings = planes or self.planes()
+        tables = self.tables
+        counts = []
+        for team in (1, -1):
+            total = np.zeros(kings[team].shape, dtype=np.uint8)
+            for d in range(4):
+                total += pieces[team][:-1] & pieces[-team][tables.neighbours[:, d]] & empty[tables.jumps[:, d]]
+            counts.append(total.sum(axis=0, dtype=np.int32))
+        return np.stack(counts, axis=1)
+
+    def mobility(self):
+        """returns an (N,) array of how many moves the team to move has, counting only first jumps if it has any"""
+        planes = self.planes()
+        steps = self.steps(planes)
+        jumps = self.jumps(planes)
+        column = (self.teams == -1).astype(np.intp) # white is column 0
+        rows = np.arange(len(self))
+        own = jumps[rows, column]
+        return np.where(own > 0, own, steps[rows, column])
+
+    def features(self):
+        """returns an (N, 10) float32 array of material (4), advancement (2), steps (2) and jumps (2), for tuning"""
+        planes = self.planes()
+        return np.concatenate([self.material(), self.advancement(), self.steps(planes), self.jumps(planes)], axis=1).astype(np.float32)
+
+    def evaluate(self): # the same numbers as search.Evaluator, for every position at once
+        """returns an (N,) array of scores for the team to move, in hundredths of a man"""
+        material = self.material()
+        advancement = self.advancement()
+        white = MAN * material[:, 0] + KING * material[:, 1] + advancement[:, 0]
+        black = MAN * material[:, 2] + KING * material[:, 3] + advancement[:, 1]
+        return ((white - black) * self.teams).astype(np.int32)
@@ -0,0 +1,503 @@
+# the rules of the game, with nothing in here that needs a display
+
+import math
+import random
+from collections import OrderedDict
+
+from .move import Move
+
+
+class Piece: # this is just a view of one square now, the board keeps the real position in a few integers
+    def __init__(self, position, place, team=0, majesty=False):
+        self.team = team # A team of -1 means black, 0 means none, and 1 means white
+        self.position = position # the position as co-ordinates (so the piece can be drawn correctly)
+        self.place = place # the place as a number, for move-checking and array-access operations
+        self.majesty = majesty # True if the piece is a king/dame, false if man/pawn
+
+        # print(f"position ([x, y]): {self.position}, place (n): {self.place}")
+    def draw(self, ctx, size):
+        if self.team == 0:
+            return
+
+        xc = (self.position[0] - 0.5) * size[0]
+        yc = (self.position[1] - 0.5) * size[1]
+        radius = 0.4 * min(size[0], size[1])
+
+        if self.team == -1:
+            ctx.set_source_rgb(0.5, 0, 0)
+        elif self.team == 1:
+            ctx.set_source_rgb(1, 1, 0.5)
+        ctx.arc(xc, yc, radius, 0, 2 * math.pi)
+        ctx.fill() # fill in the circle
+        # now we need to draw the circles around them
+        ctx.set_source_rgb(0.5, 0.5, 0) # a sort of dark yellow
+        ctx.set_line_width(0.004*radius**2 + 0.07*radius) # strange quadrilateral i made up to scale the radius
+        ctx.arc(xc, yc, radius, 0, 2 * math.pi)
+        ctx.stroke()
+        if self.majesty:
+            ctx.set_line_width(0.00256*radius**2 + 0.056*radius)
+            ctx.arc(xc, yc, radius * 0.8 - 0.004*radius**2, 0, 2 * math.pi)
+            ctx.stroke()
+
+class Geometry: # everything about the shape of a board that doesn't change when pieces move, so we only work it out once per size
+    """precomputed neighbour, jump and shift tables for one board size"""
+    _cache = {}
+
+    @classmethod
+    def get(cls, size): # boards of the same size share their tables
+        """returns the (shared) geometry for a board size"""
+        key = (size[0], size[1])
+        if key not in cls._cache:
+            cls._cache[key] = cls(key)
+        return cls._cache[key]
+
+    def __init__(self, size):
+        self.size = size
+        self.width = size[0]//2 # how many dark squares there are in a row
+        self.squares = self.width * size[1]
+        self.full = (1 << self.squares) - 1 # a mask with a bit for every dark square
+
+        # bit n of a mask is place n + 1, so place 1 is the lowest bit
+        self.positions = [] # co-ordinates of each place, starting at [1, 1] like the drawing code expects
+        for i in range(self.squares):
+            row = i // self.width
+            self.positions.append([2*(i % self.width) + (row + 1) % 2 + 1, row + 1])
+
+        # the directions are in the same order as they always were: down-left, down-right, up-left, up-right
+        # this means the opposite of direction d is 3 - d
+        vectors = [(-1, 1), (1, 1), (-1, -1), (1, -1)]
+        self.neighbours = [] # neighbours[i][d] is the square next to i in direction d, or -1 if we fall off the board
+        for i in range(self.squares):
+            x, y = self.positions[i]
+            found = []
+            for dx, dy in vectors:
+                nx, ny = x + dx, y + dy
+                if 1 <= nx <= size[0] and 1 <= ny <= size[1]:
+                    found.append((ny - 1)*self.width + (nx - 1)//2)
+                else:
+                    found.append(-1)
+            self.neighbours.append(tuple(found))
+        self.jumps = [tuple(self.neighbours[n][d] if n >= 0 else -1 for d, n in enumerate(row)) for row in self.neighbours] # where we land if we jump in direction d
+
+        # the distance to a neighbour depends on whether the row is odd or even, so each direction gets a shift for each kind of row
+        # stepShifts[d] is a list of (shift, mask), where every square in mask has its neighbour at square + shift
+        self.stepShifts = []
+        self.jumpShifts = [] # the same, but (shift to the jumped square, shift from there to the landing square, mask)
+        for d in range(4):
+            steps = {}
+            jumps = {}
+            for i in range(self.squares):
+                n = self.neighbours[i][d]
+                if n < 0:
+                    continue
+                steps[n - i] = steps.get(n - i, 0) | (1 << i)
+                j = self.jumps[i][d]
+                if j >= 0:
+                    jumps[(n - i, j - n)] = jumps.get((n - i, j - n), 0) | (1 << i)
+            self.stepShifts.append([(shift, mask) for shift, mask in steps.items()])
+            self.jumpShifts.append([(shift, behind, mask) for (shift, behind), mask in jumps.items()])
+
+        self.forwards = {1: (2, 3), -1: (0, 1)} # white men go up the board and black men go down
+        self.kingRows = {1: (1 << self.width) - 1, -1: ((1 << self.width) - 1) << (self.squares - self.width)} # where each team gets crowned
+
+        # random numbers for Zobrist hashing: a position's hash is all the numbers for its pieces xored together, so a move only changes a few of them
+        # the generator is seeded with the size so every process gets the same hashes
+        generator = random.Random(f"{size[0]}x{size[1]}")
+        self.zobristMen = {team: [generator.getrandbits(64) for i in range(self.squares)] for team in (1, -1)}
+        self.zobristKings = {team: [generator.getrandbits(64) for i in range(self.squares)] for team in (1, -1)}
+        self.zobristTeam = generator.getrandbits(64) # xored in when it's black's turn
+
+        self.moveCache = MoveCache() # positions we've already found the moves for, shared by every board of this size
+
+class MoveCache: # a least-recently-used cache of the valid moves in a position, so positions we keep coming back to are free
+    """a bounded LRU cache from (hash, team) to the valid moves, which counts its hits, misses and evictions"""
+    def __init__(self, maxSize=1 << 16):
+        self.maxSize = maxSize
+        self.entries = OrderedDict() # (hash, team) -> (white, black, kings, moves); the whole position is kept so a hash collision can't give us the wrong moves
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, board):
+        """returns the cached moves for the board's position, or None"""
+        key = (board.hash, board.currentTeam)
+        entry = self.entries.get(key)
+        if entry is None or entry[0] != board.white or entry[1] != board.black or entry[2] != board.kings:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return entry[3]
+
+    def put(self, board, moves):
+        """remembers the moves for the board's position, forgetting the oldest position if the cache is full"""
+        if self.maxSize <= 0: # the cache is turned off
+            return
+        self.entries[(board.hash, board.currentTeam)] = (board.white, board.black, board.kings, moves)
+        if len(self.entries) > self.maxSize:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        self.entries.clear()
+        self.hits = self.misses = self.evictions = 0
+
+def shift(mask, amount): # python won't shift by a negative number, so this picks the direction for us
+    return mask << amount if amount > 0 else mask >> -amount
+
+def bits(mask): # goes through the squares in a mask, lowest first
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+class Board:
+    def __init__(self, size):
+        self.size = size
+        self.geometry = Geometry.get(size)
+
+        # the whole position is just three numbers, with one bit per dark square
+        width = self.geometry.width
+        blackRows = width * (self.size[1]//2 - 1) # black is at the top
+        black = (1 << blackRows) - 1
+        white = self.geometry.full ^ ((1 << (self.geometry.squares - blackRows)) - 1) # white is at the bottom
+        self.setPosition(white, black, 0, 1) # and nobody starts as a king
+
+    @classmethod
+    def fromFen(cls, fen, size=(10, 10)): # FEN as PDN uses it, e.g. W:W31,32,K45:B1-5
+        """returns a board set up from a PDN FEN string"""
+        board = cls.__new__(cls)
+        board.size = list(size)
+        board.geometry = Geometry.get(size)
+        team = 1
+        pieces = {1: 0, -1: 0}
+        kings = 0
+        for number, section in enumerate(fen.strip().strip('"').split(":")):
+            section = section.strip()
+            if not section:
+                continue
+            if number == 0 and section in ("W", "B"): # whose turn it is; after that a bare W or B is a side with no pieces left
+                team = 1 if section == "W" else -1
+                continue
+            if section[0] not in "WB":
+                raise ValueError(f"bad FEN section {section!r}")
+            colour = 1 if section[0] == "W" else -1
+            for item in section[1:].split(","):
+                item = item.strip()
+                if not item:
+                    continue
+                king = item[0] == "K"
+                if king:
+                    item = item[1:]
+                first, _, last = item.partition("-") # ranges like 1-20 are allowed
+                for place in range(int(first), int(last or first) + 1):
+                    if not 1 <= place <= board.geometry.squares:
+                        raise ValueError(f"square {place} isn't on a {size[0]}x{size[1]} board")
+                    pieces[colour] |= 1 << (place - 1)
+                    if king:
+                        kings |= 1 << (place - 1)
+        if pieces[1] & pieces[-1]:
+            raise ValueError("a square can't have a white and a black piece on it")
+        board.setPosition(pieces[1], pieces[-1], kings, team)
+        return board
+
+    def fen(self):
+        """returns the position as a PDN FEN string"""
+        sections = ["W" if self.currentTeam == 1 else "B"]
+        for letter, pieces in (("W", self.white), ("B", self.black)):
+            sections.append(letter + ",".join(("K" if self.kings >> square & 1 else "") + str(square + 1) for square in bits(pieces)))
+        return ":".join(sections)
+
+    def setPosition(self, white, black, kings, team): # this forgets the history, as we can't undo back into a position we never saw
+        """sets up the board with the given bitboards and team to move"""
+        self.white = white
+        self.black = black
+        self.kings = kings & (white | black)
+        self.currentTeam = team
+        self.history = [] # the undo stack, with everything needed to take back each move
+        self.hash = self.findHash()
+
+        self.validMoves = self.findValidMoves() # HOW did i not realise i needed to put this last?
+
+    def copy(self): # this is much cheaper than building a new board, as we don't need to set anything up
+        """returns a copy of the position that can be changed without affecting this board"""
+        board = Board.__new__(Board)
+        board.__dict__.update(self.__dict__)
+        board.validMoves = self.validMoves.copy()
+        board.history = self.history.copy()
+        return board
+
+    @property
+    def pieces(self): # the drawing code still wants pieces, so we make them when they're asked for
+        """returns a Piece for every place, for drawing"""
+        positions = self.geometry.positions
+        return [Piece(positions[i], i + 1, self.teamAt(i + 1), bool(self.kings >> i & 1)) for i in range(self.geometry.squares)]
+
+    def teamAt(self, place):
+        """returns the team of the piece at place, or 0 if it is empty"""
+        bit = 1 << (place - 1)
+        if self.white & bit:
+            return 1
+        if self.black & bit:
+            return -1
+        return 0
+
+    def findHash(self): # makeMove keeps the hash up to date, so this is only needed when a position is set up from scratch
+        """returns the Zobrist hash of the position, worked out from scratch"""
+        geometry = self.geometry
+        found = 0 if self.currentTeam == 1 else geometry.zobristTeam
+        for team, pieces in ((1, self.white), (-1, self.black)):
+            for square in bits(pieces & ~self.kings):
+                found ^= geometry.zobristMen[team][square]
+            for square in bits(pieces & self.kings):
+                found ^= geometry.zobristKings[team][square]
+        return found
+
+    def repetitions(self): # only moves by kings without taking anything can be undone, so we stop looking at the first other move
+        """returns how many times the current position has happened in this game, including now"""
+        count = 1
+        for move, capturedKings, promoted, team, previousHash, reversible in reversed(self.history):
+            if not reversible:
+                break
+            if previousHash == self.hash and team == self.currentTeam:
+                count += 1
+        return count
+
+    def isDraw(self):
+        """returns True if the position has happened three times, which is a draw"""
+        return self.repetitions() >= 3
+
+    def isLegal(self, move):
+        """returns True if move is one of validMoves"""
+        if self._legal is None: # the set is only made if someone asks, the search doesn't need it
+            self._legal = frozenset(self.validMoves)
+        return move in self._legal
+
+    def findMove(self, start, end): # this is for clicks, where all we know is where the piece was and where it went
+        """returns the valid move from place start to place end, or None if there isn't one"""
+        for move in self.validMoves:
+            if move.start == start - 1 and move.end == end - 1:
+                return move
+        return None
+
+    def parseMove(self, movetext): # only for text from people (the drop-down, files), nothing in here needs it
+        """returns the valid move written as movetext in long notation or short notation (17x37), or None if there isn't exactly one"""
+        movetext = movetext.strip()
+        found = None
+        for move in self.validMoves:
+            text = str(move)
+            if text == movetext:
+                return move
+            if move.captured and f"{move.start + 1}x{move.end + 1}" == movetext: # short notation only says where a take starts and ends
+                if found is not None:
+                    return None # two different ways of taking from here to there, so we can't tell which was meant
+                found = move
+        return found
+
+    def move(self, move): # this is for moves from players, so it checks the move and finds the next moves; telling anyone about it is the caller's job
+        """moves the piece and does takes, the move must be one of validMoves (or its movetext); returns False if it isn't"""
+        if isinstance(move, str):
+            move = self.parseMove(move)
+        if move is None or not self.isLegal(move): # findValidMoves already worked out everything about the move, so we don't need to check it again
+            return False
+
+        self.makeMove(move)
+        self.validMoves = self.findValidMoves() # update the list of valid moves
+        return True
+
+    def takeBack(self): # the player version of unmakeMove
+        """undoes the last move and returns it, or returns None if there is nothing to undo"""
+        if not self.history:
+            return None
+        move = self.unmakeMove()
+        self.validMoves = self.findValidMoves()
+        return move
+
+    def makeMove(self, move): # this doesn't check anything or update validMoves, so the search can call it as often as it likes
+        """makes a move without checking it, and remembers how to undo it"""
+        geometry = self.geometry
+        # every piece that gets jumped is removed at once, at the end of the move
+        startBit = 1 << move.start
+        endBit = 1 << move.end
+        captured = move.captured
+        team = self.currentTeam
+        previousHash = self.hash
+        if team == 1:
+            self.white ^= startBit ^ endBit
+            self.black &= ~captured # KILL THEM!!!
+        else:
+            self.black ^= startBit ^ endBit
+            self.white &= ~captured
+        # move majesty as well, and if it's dead it's no longer a king
+        capturedKings = self.kings & captured
+        self.kings ^= capturedKings
+        promoted = False
+        if self.kings & startBit:
+            self.kings ^= startBit ^ endBit
+            keys = geometry.zobristKings[team]
+            self.hash ^= keys[move.start] ^ keys[move.end]
+            reversible = not captured
+        else:
+            reversible = False # men can't go backwards
+            self.hash ^= geometry.zobristMen[team][move.start]
+            if endBit & geometry.kingRows[team]: # if the piece is at the top and white or at the bottom and black
+                self.kings |= endBit # make the piece a king
+                promoted = True
+                self.hash ^= geometry.zobristKings[team][move.end]
+            else:
+                self.hash ^= geometry.zobristMen[team][move.end]
+        if captured:
+            men = geometry.zobristMen[-team]
+            kings = geometry.zobristKings[-team]
+            for square in bits(captured):
+                self.hash ^= kings[square] if capturedKings >> square & 1 else men[square]
+        self.hash ^= geometry.zobristTeam
+
+        self.history.append((move, capturedKings, promoted, team, previousHash, reversible)) # this is everything we need to put it back
+        self.currentTeam = -team # swap the team, as a move has been made
+
+    def unmakeMove(self):
+        """undoes the last move made with makeMove (or move) and returns it, without updating validMoves"""
+        move, capturedKings, promoted, team, previousHash, reversible = self.history.pop()
+        startBit = 1 << move.start
+        endBit = 1 << move.end
+        captured = move.captured
+        if promoted:
+            self.kings ^= endBit
+        elif self.kings & endBit:
+            self.kings ^= startBit ^ endBit
+        self.kings |= capturedKings
+        if team == 1:
+            self.white ^= startBit ^ endBit
+            self.black |= captured # bring them back to life
+        else:
+            self.black ^= startBit ^ endBit
+            self.white |= captured
+
+        self.currentTeam = team
+        self.hash = previousHash
+        return move
+
+    def findValidMoves(self): # this function returns an array of the valid moves
+        """returns an array of the valid moves this turn"""
+        self._legal = None
+        cache = self.geometry.moveCache
+        moves = cache.get(self)
+        if moves is None:
+            moves = self.generateMoves()
+            cache.put(self, tuple(moves)) # a tuple, so nobody can change the cached moves by accident
+            return moves
+        return list(moves)
+
+    def generateMoves(self): # findValidMoves without the cache
+        """returns an array of the valid moves this turn, always working them out from scratch"""
+        geometry = self.geometry
+        if self.currentTeam == 1:
+            own, enemy = self.white, self.black
+        else:
+            own, enemy = self.black, self.white
+        empty = geometry.full & ~(own | enemy)
+
+        jumpers = self.findJumpers()
+        if jumpers: # taking is compulsory, and so is taking as many as possible
+            return self.findCaptures(jumpers, empty, enemy)
+
+        # nothing can take anything so we just look for steps
+        found = []
+        for d in range(4):
+            movers = own if d in geometry.forwards[self.currentTeam] else own & self.kings # only kings can go backwards
+            for amount, mask in geometry.stepShifts[d]:
+                for end in bits(shift(movers & mask, amount) & empty):
+                    found.append(Move.step(end - amount, end))
+        found.sort() # keep the moves in the order of the pieces making them
+        return found
+
+    def findJumpers(self): # this is cheap enough to check whether anything has to be taken without finding any moves
+        """returns a mask of the pieces on the current team that can take something"""
+        geometry = self.geometry
+        if self.currentTeam == 1:
+            own, enemy = self.white, self.black
+        else:
+            own, enemy = self.black, self.white
+        empty = geometry.full & ~(own | enemy)
+
+        # we find which pieces can take something by shifting all of them at once
+        jumpers = 0
+        for d in range(4):
+            for amount, behind, mask in geometry.jumpShifts[d]:
+                landing = shift(shift(own & mask, amount) & enemy, behind) & empty
+                jumpers |= shift(landing, -amount - behind) # shift the landing squares back to find who jumped there
+        return jumpers
+
+    def findCaptures(self, jumpers, empty, enemy): # this used to be recursive, but an explicit stack doesn't mind how long the chains get
+        """returns the moves that take the most pieces, starting from any of the squares in jumpers"""
+        neighbours = self.geometry.neighbours
+        jumps = self.geometry.jumps
+        threshold = 0 # the most pieces anyone can take
+        found = {} # (start, end, captured) -> move; going round a loop either way takes the same pieces, so that's only one move
+
+        for start in bits(jumpers):
+            landable = empty | (1 << start) # the piece has left its square, so it can land back on it
+            # every square we land on is a node that remembers the node it came from, so paths are only made for the moves we keep
+            nodes = [(start, -1)]
+            stack = [(0, 0, 0)] # (node, mask of captured pieces, how many pieces that is)
+            # what can happen next only depends on where we are and what's been taken, and different orders of jumps get to the
+            # same place having taken the same pieces all the time, so each of those only gets looked at once
+            seen = {(start, 0)}
+            while stack:
+                node, captured, count = stack.pop()
+                place = nodes[node][0]
+                extended = False
+                for d in (3, 2, 1, 0): # backwards, so they come off the stack in the usual order
+                    target = neighbours[place][d]
+                    if target < 0 or not (enemy >> target) & 1 or (captured >> target) & 1: # we can only jump enemies, and only once each
+                        continue
+                    behind = jumps[place][d]
+                    if behind < 0 or not (landable >> behind) & 1: # captured pieces stay on the board until the end so we can't land on them
+                        continue
+                    extended = True
+                    state = (behind, captured | (1 << target))
+                    if state in seen: # it ends up with the same moves as last time, which found already has
+                        continue
+                    seen.add(state)
+                    nodes.append((behind, node))
+                    stack.append((len(nodes) - 1, state[1], count + 1))
+
+                if extended or count < threshold: # either we can keep going or it's not worth having
+                    continue
+                if count > threshold: # if we've found more important moves than any we have
+                    threshold = count # require new moves to be at least as important
+                    found.clear() # clear the old, unimportant moves
+                key = (start, place, captured)
+                if key not in found:
+                    path = []
+                    while node >= 0:
+                        path.append(nodes[node][0])
+                        node = nodes[node][1]
+                    found[key] = Move.jump(tuple(reversed(path)), captured)
+        return list(found.values())
+
+
+
+# ================================ Working Out ================================
+# NOTE: these calculations only work for even board widths
+# i = x - 1 + (y-1)*(board.width/2)
+# i - (y-1)*(board.width/2) = x - 1
+# i % (board.width/2) = x - 1; as x - 1 < board.width/2 and y-1 is an integer
+# (i % (board.width/2)) + 1 = x
+
+# i - x + 1 = (y-1)*(board.width/2)
+# i - (i % (board.width/2)) = (y-1)*board.width
+# (i - (i % board.width/2))/(board.width/2) = y - 1
+# i // (board.width/2) = y - 1
+# i // (board.width/2) + 1 = y
+
+# ---- some logic for checking if the place is at the edge of the board
+# if 1 <= (start - 1)%width + 1 + offset <= width:
+# if 0 - offset <= (start - 1)%width < width - offset: # if offset is positive then the <= is always true, if negative then the < is always true
+# if (offset > 0 and (start - 1)%width < width - offset) or (offset < 0 and 0 - offset <= (start - 1)%width): # when offset is positive it is 1, when negative it is -1
+# if (offset > 0 and (start - 1)%width < width - 1) or (offset < 0 and 1 <= (start - 1)%width): # (start - 1)%width can only have one value < 1 and only one >= width - 1
+# if (offset > 0 and (start - 1)%width != width - 1) or (offset < 0 and (start - 1)%width != 0): # can do some weird maths here because != works the same as ==
+# if (offset > 0 and start%width != 0) or (offset < 0 and start%width != 1): # use evenRow (which I just added)
+# if (start%width != evenRow) or (start%width != evenRow): # oh look they're the same
+# if start%width != evenRow: # somewhat surprisingly, this works as places begin at 1
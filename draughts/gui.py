@@ -0,0 +1,365 @@
+# the GTK front-end; gi is only imported once we actually start the window, so the rest of the package works without a display
+
+import argparse
+import math
+import time
+
+from .board import Board, Piece, bits
+from .pdn import Game, formatGame
+from .stats import session
+from .tablebase import DRAW, Tablebase
+from .worker import SearchWorker
+
+
+class BoardView: # this is the part of the board that the window cares about
+    def __init__(self, board):
+        self.board = board
+        self.rectangleSize = (640/board.size[0], 480/board.size[1])
+        self.selection = [0, 0, 0]
+        self.turnLabel = None # this is how we might tell the players whose turn it is
+        self.moveList = None # this is how we can tell the player what moves they can make, and allow keyboard play
+        self.moveChooser = None # the drop-down showing moveList, so the engine can point at the move it likes
+        self.worker = None # the engine, thinking in another thread
+        self.analysing = False # if True the engine thinks about every position until told to stop
+        self.background = None # the empty board, drawn once for each size of window
+        self.frame = None # what's on screen, kept so we only redraw the squares that change
+        self.surfaceSize = None
+        self.drawn = None # (white, black, kings, selected place) when the frame was last brought up to date
+        self.tablebase = None # if there are few enough pieces left this knows who wins
+
+    def draw(self, ctx, w, h, scale=1): # the board itself only changes size, so it's drawn once and then copied; only squares that changed get redrawn
+        """draws the board and everything on it; scale is the window's scale factor, so the copies stay sharp on HiDPI screens"""
+        import cairo # this always comes with GTK, and we only need it once GTK is drawing
+
+        board = self.board
+        rectangleSize = w/board.size[0], h/board.size[1]
+        if self.background is None or self.surfaceSize != (w, h, scale): # the window changed size, so start again
+            # these have to be real images: GTK draws into a recording surface, and anything made with create_similar from
+            # that just records every drawing command too, so it would get slower every time a square changed
+            self.background = self.makeSurface(cairo, w, h, scale)
+            self.drawBackground(cairo.Context(self.background), w, h)
+            self.frame = self.makeSurface(cairo, w, h, scale) # the background with the pieces on top
+            self.surfaceSize = (w, h, scale)
+            self.drawn = None
+
+        # work out which squares are different to last time
+        state = (board.white, board.black, board.kings, self.selection[2])
+        if self.drawn is None: # everything needs drawing
+            frameCtx = cairo.Context(self.frame)
+            frameCtx.set_source_surface(self.background, 0, 0)
+            frameCtx.paint()
+            dirty = board.white | board.black
+            selected = 0
+        else:
+            white, black, kings, selected = self.drawn
+            dirty = (white ^ board.white) | (black ^ board.black) | (kings ^ board.kings)
+        if selected != self.selection[2]: # the old selection needs rubbing out and the new one drawing
+            for place in (selected, self.selection[2]):
+                if place:
+                    dirty |= 1 << (place - 1)
+
+        if dirty:
+            frameCtx = cairo.Context(self.frame)
+            for square in bits(dirty):
+                self.drawSquare(frameCtx, square, rectangleSize)
+        self.drawn = state
+
+        ctx.set_source_surface(self.frame, 0, 0)
+        ctx.paint()
+
+        # update the rectangleSize so we can use it when clicked
+        self.rectangleSize = rectangleSize
+
+    def makeSurface(self, cairo, w, h, scale):
+        """returns an image the size of the window in real pixels, which is drawn on in window co-ordinates"""
+        surface = cairo.ImageSurface(cairo.FORMAT_RGB24, math.ceil(w * scale), math.ceil(h * scale))
+        surface.set_device_scale(scale, scale)
+        return surface
+
+    def drawBackground(self, ctx, w, h): # the squares and their numbers, which never change
+        """draws the empty board"""
+        board = self.board
+        ctx.set_source_rgb(0, 0, 0)
+        ctx.paint()
+
+        tileCounter = 1
+        rectangleSize = w/board.size[0], h/board.size[1]
+        textSize = min(rectangleSize[0]/4, rectangleSize[1]*2/3)
+        ctx.select_font_face('Sans') # the font is the same for every number, so we only need to set it once
+        ctx.set_font_size(textSize)
+        for y in range(board.size[1]):
+            for x in range(board.size[0]):
+                if (x+y) % 2 == 0:
+                    ctx.set_source_rgb(1, 1, 1)
+                    ctx.rectangle(x*rectangleSize[0], y*rectangleSize[1], rectangleSize[0], rectangleSize[1])
+                    ctx.fill()
+                else:
+                    ctx.set_source_rgb(0, 0.5, 0.5)
+                    ctx.move_to(x*rectangleSize[0], (y+1)*rectangleSize[1])
+                    ctx.show_text(str(tileCounter))
+                    tileCounter += 1
+
+    def drawSquare(self, ctx, square, rectangleSize): # square counts from 0, like the bits of the board
+        """redraws one dark square of the frame: the background, then the selection, then the piece"""
+        board = self.board
+        position = board.geometry.positions[square]
+        ctx.save()
+        ctx.rectangle((position[0] - 1) * rectangleSize[0], (position[1] - 1) * rectangleSize[1], rectangleSize[0], rectangleSize[1])
+        ctx.clip() # nothing we draw can spill onto the next square
+        ctx.set_source_surface(self.background, 0, 0)
+        ctx.paint()
+
+        # We need to draw a circle around the selected piece before the piece is drawn
+        if self.selection[2] == square + 1:
+            xc = (self.selection[0] - 0.5) * rectangleSize[0]
+            yc = (self.selection[1] - 0.5) * rectangleSize[1]
+            radius = 0.48 * min(rectangleSize[0], rectangleSize[1])
+
+            ctx.set_source_rgb(1, 0, 1)
+            ctx.arc(xc, yc, radius, 0, 2 * math.pi)
+            ctx.fill()
+
+        if (team := board.teamAt(square + 1)):
+            Piece(position, square + 1, team, bool(board.kings >> square & 1)).draw(ctx, rectangleSize)
+        ctx.restore()
+
+    def clicked(self, x, y): # this function is responsible for handling clicks (obviously)
+        """responsible for handling clicks"""
+        board = self.board
+        position = int(x // self.rectangleSize[0]) + 1, int(y // self.rectangleSize[1]) + 1
+        # print(f"Click in position {position}")
+        if (position[0] + position[1]) % 2 == 1: # this checks if we are in a black square
+            i = (position[0]+1)//2 + (position[1]-1)*(board.size[0]//2)
+            if (team := board.teamAt(i)): # check that there is a piece there; NOTE the walrus operator (:=) returns the assigned value
+                if team == board.currentTeam: # only allow selection of a piece on our team
+                    self.selection = [position[0], position[1], i] # select the piece
+                return # even if we couldn't select it we're done here
+            move = board.findMove(self.selection[2], i)
+            if move:
+                self.move(move) # try to move the previously selected piece to where we just clicked
+
+            # print(f"Click placed at {i}")
+
+        self.selection = [0, 0, 0] # reset the selection
+
+    def move(self, move): # the board does the moving, we just need to tell everyone about it
+        """makes the move on the board and updates the widgets"""
+        board = self.board
+        if isinstance(move, str):
+            move = board.parseMove(move)
+        if move is None or not board.isLegal(move): # a bad click shouldn't stop the engine thinking
+            return False
+        self.stopThinking() # the board shares its move cache with the search, so the search has to stop before we touch it
+        board.move(move)
+        print(move) # the terminal gets every move as it happens, --pdn keeps the whole game
+        self.update()
+        return True
+
+    def takeBack(self):
+        """takes back the last move and updates the widgets"""
+        if not self.board.history:
+            return False
+        self.stopThinking()
+        move = self.board.takeBack()
+        if move is None:
+            return False
+        print(f"took back {move}")
+        self.selection = [0, 0, 0]
+        self.update()
+        return True
+
+    def update(self): # after the position changes we need to tell the player what's going on
+        """updates the turn label and the move list for the current position"""
+        board = self.board
+        self.stopThinking() # anything it was thinking about is out of date now
+        if self.turnLabel: # just make sure that it exists
+            self.turnLabel.set_label(f"It is {self.teamName()}'s turn") # we need to tell the player whose turn it is
+        if self.moveList:
+            length = self.moveList.get_n_items()
+            self.moveList.splice(0, length, [str(move) for move in board.validMoves])
+
+        if len(board.validMoves) == 0 and self.turnLabel: # if there are no moves left you lose
+            if board.currentTeam == 1:
+                self.turnLabel.set_label("Black wins!")
+            else:
+                self.turnLabel.set_label("White wins!")
+        elif board.isDraw() and self.turnLabel: # the same position three times is a draw
+            self.turnLabel.set_label("Draw by repetition!")
+        else:
+            if self.tablebase and self.turnLabel:
+                self.showTablebase()
+            if self.analysing:
+                self.think(None)
+
+    def showTablebase(self):
+        """adds the tablebase's verdict to the turn label, if the position is in it"""
+        board = self.board
+        if board.geometry is not self.tablebase.geometry or (board.white | board.black).bit_count() > self.tablebase.maxPieces:
+            return
+        found = self.tablebase.probe(board)
+        if found is None:
+            return
+        result, moves = found
+        if result == DRAW:
+            verdict = "it's a draw"
+        else:
+            winner = "white" if result * board.currentTeam == 1 else "black"
+            verdict = f"{winner} wins in {moves} moves"
+        self.turnLabel.set_label(f"It is {self.teamName()}'s turn ({verdict} with best play)")
+
+    def stopThinking(self):
+        if self.worker:
+            self.worker.cancel()
+
+    def teamName(self):
+        if self.board.currentTeam == 1: # this feels a bit extreme but whatever
+            return "white"
+        else:
+            return "black"
+
+    def think(self, seconds, done=None): # seconds=None thinks until the position changes or analysis is turned off
+        """starts the engine on the current position, showing its progress as it goes"""
+        if self.worker and self.board.validMoves:
+            self.worker.submit(self.board, seconds, self.showProgress, done)
+
+    def showProgress(self, result): # called on the main loop after every depth the engine finishes
+        """shows the engine's best move so far in the turn label and picks it in the drop-down"""
+        if self.turnLabel:
+            self.turnLabel.set_label(f"It is {self.teamName()}'s turn; depth {result.depth}: {result.move} ({result.score / 100:+.2f})")
+        if self.moveChooser and result.move in self.board.validMoves:
+            self.moveChooser.set_selected(self.board.validMoves.index(result.move))
+
+view = None
+win = None
+
+def clicked(gesture, data, x, y): # this function gets the board to handle the click
+    # print(f"Click recieved at x={x}, y={y}")
+    view.clicked(x, y)
+    win.da.queue_draw()
+
+def chooseMove(button): # basically a simplified version of BoardView.clicked
+    movetext = win.moveChooser.get_selected_item().get_string() # get the string from the selected StringObject
+    move = view.board.parseMove(movetext)
+    if move: # sanity check
+        view.move(move) # make the move
+        win.da.queue_draw() # we need to refresh the image
+
+def computerMove(button): # the computer plays one move for whoever's turn it is, once it's finished thinking
+    view.think(1.0, playResult)
+
+def playResult(result):
+    print(result)
+    if view.move(result.move):
+        win.da.queue_draw()
+
+def hint(button): # like computerMove, but the player still has to make the move
+    view.think(2.0, showHint)
+
+def showHint(result):
+    view.showProgress(result)
+    if view.turnLabel:
+        view.turnLabel.set_label(f"It is {view.teamName()}'s turn; try {result.move}")
+
+def analyse(button): # keeps the engine thinking about whatever is on the board
+    view.analysing = button.get_active()
+    if view.analysing:
+        view.think(None)
+    else:
+        view.update()
+
+def takeBack(button):
+    if view.takeBack():
+        win.da.queue_draw()
+
+def activation(app): # this function gets called when the app is activated
+    global win
+    from gi.repository import Gtk # main has already picked the version for us
+
+    win = Gtk.ApplicationWindow(application=app)
+
+    win.grid = Gtk.Grid() # create a grid
+    win.set_child(win.grid) # add the grid to the window
+
+    # win.button = Gtk.Button(label="Test")
+    # win.grid.attach(win.button, 1, 0, 1, 1) # https://docs.gtk.org/gtk4/method.Grid.attach.html
+
+    # create the drawing area to draw the game in
+    win.da = Gtk.DrawingArea()
+    win.da.set_hexpand(True)
+    win.da.set_vexpand(True)
+    win.da.set_draw_func(draw, None)
+    # the area needs to pick up button presses
+    click = Gtk.GestureClick.new()
+    click.connect("pressed", clicked) # when the mouse button is pressed on the game window we need to call clicked
+    win.da.add_controller(click)
+
+    # instead of putting the drawing area directly in the box, we ensure it remains square
+    win.aspectFrame = Gtk.AspectFrame()
+    win.aspectFrame.set_child(win.da)
+    win.grid.attach(win.aspectFrame, 0, 0, 1, 1) # column 0, row 0
+
+    # We need some way of telling the player whose turn it is
+    view.turnLabel = Gtk.Label(label="It is white's turn")
+    win.grid.attach(view.turnLabel, 0, 1, 1, 1) # column 0, row 1
+    # A way to see what moves we can make would be nice
+    view.moveList = Gtk.StringList.new([str(move) for move in view.board.validMoves]) # create a GObject string list for the valid moves to be copied into
+    win.moveChooser = Gtk.DropDown(model=view.moveList) # create a DropDown that uses the string list we just created
+    view.moveChooser = win.moveChooser
+    win.grid.attach(win.moveChooser, 1, 1, 1, 1) # column 1, row 1
+    # The player should be able to press a button to make the move
+    win.moveButton = Gtk.Button(label="Move!")
+    win.moveButton.connect('clicked', chooseMove) # when the button is clicked we need to call chooseMove
+    win.grid.attach(win.moveButton, 2, 1, 1, 1) # column 2, row 1
+    # and take it back if they change their mind
+    win.undoButton = Gtk.Button(label="Undo")
+    win.undoButton.connect('clicked', takeBack)
+    win.grid.attach(win.undoButton, 3, 1, 1, 1) # column 3, row 1
+    # or let the computer have a go
+    win.computerButton = Gtk.Button(label="Computer move")
+    win.computerButton.connect('clicked', computerMove)
+    win.grid.attach(win.computerButton, 4, 1, 1, 1) # column 4, row 1
+    # or just ask it what it would do
+    win.hintButton = Gtk.Button(label="Hint")
+    win.hintButton.connect('clicked', hint)
+    win.grid.attach(win.hintButton, 5, 1, 1, 1) # column 5, row 1
+    win.analyseButton = Gtk.ToggleButton(label="Analyse")
+    win.analyseButton.connect('toggled', analyse)
+    win.grid.attach(win.analyseButton, 6, 1, 1, 1) # column 6, row 1
+
+
+    win.set_default_size(640, 480)
+    win.set_title("Draughts")
+    win.present()
+
+def draw(area, ctx, w, h, data):
+    view.draw(ctx, w, h, area.get_scale_factor())
+
+def main(arguments=None): # we only load GTK here, so importing this module is still cheap
+    global view
+    parser = argparse.ArgumentParser(description="play draughts")
+    parser.add_argument("--tablebase", default=None, help="endgame tablebase file made with python -m draughts.tablebase")
+    parser.add_argument("--pdn", default=None, help="add the game to the end of this PDN file when the window closes")
+    parser.add_argument("--stats", action="store_true", help="count and time what the move generator does while the window is open, and print it when it closes")
+    parser.add_argument("--profile", default=None, metavar="FILE", help="run cProfile as well and save it to FILE for python -m pstats")
+    options = parser.parse_args(arguments)
+    import gi
+
+    gi.require_version('Gtk', '4.0')
+    gi.require_version('Adw', '1')
+    from gi.repository import Adw, GLib
+
+    view = BoardView(Board([10, 10]))
+    if options.tablebase:
+        view.tablebase = Tablebase(options.tablebase)
+    view.worker = SearchWorker(GLib.idle_add, tablebase=view.tablebase) # results come back to us through the main loop, never straight from the thread
+
+    app = Adw.Application(application_id="org.duckdns.number251.draughts")
+    app.connect('activate', activation) # call activation when the app is ready to activate
+
+    with session(options.stats, options.profile):
+        status = app.run(None)
+        view.stopThinking() # saving the game uses the move cache too, so the search has to be finished first
+    if options.pdn and view.board.history:
+        with open(options.pdn, "a") as file:
+            file.writelines(formatGame(Game.fromBoard(view.board, tags={"Event": "casual game", "Date": time.strftime("%Y.%m.%d")})))
+    return status
@@ -0,0 +1,42 @@
+# moves are worked out once when the moves are found and then just passed around, so nobody has to read movetext back in
+
+from collections import namedtuple
+
+
+class Move(namedtuple("Move", ["start", "end", "path", "captured"])): # squares count from 0 here, like the bits of the board, so place = square + 1
+    """a move as its start and end squares, every square it lands on (path) and a mask of the pieces it takes (captured)"""
+    __slots__ = ()
+    _interned = {} # the same move is always the same object, so comparing them is usually just an identity check
+
+    def __new__(cls, start, end, path, captured=0):
+        key = (start, end, path, captured)
+        move = cls._interned.get(key)
+        if move is None:
+            move = cls._interned[key] = super().__new__(cls, start, end, path, captured)
+        return move
+
+    @classmethod
+    def step(cls, start, end):
+        """returns the move for a step from start to end"""
+        return cls(start, end, (start, end))
+
+    @classmethod
+    def jump(cls, path, captured):
+        """returns the move for a sequence of jumps landing on each square in path"""
+        return cls(path[0], path[-1], path, captured)
+
+    @property
+    def isCapture(self):
+        return self.captured != 0
+
+    @property
+    def captures(self): # how many pieces the move takes
+        return self.captured.bit_count()
+
+    def __str__(self): # the long notation (e.g. 32-28 or 17x28x37) is only made when someone wants to read it
+        if self.captured:
+            return "x".join(str(square + 1) for square in self.path)
+        return f"{self.start + 1}-{self.end + 1}"
+
+    def __repr__(self):
+        return f"Move({self})"
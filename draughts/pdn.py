@@ -0,0 +1,369 @@
+# reading and writing games in PDN (portable draughts notation), one game at a time so files of any size can be read
+# in the same amount of memory, and checking whole collections of them by playing every move through the rules
+
+import argparse
+import io
+import os
+import re
+import sys
+import tempfile
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from .board import Board
+
+RESULTS = {"2-0": 1, "0-2": -1, "1-1": 0, "*": None} # PDN scores, from white's point of view
+OLD_RESULTS = {"1-0": "2-0", "0-1": "0-2", "1/2-1/2": "1-1"} # some collections use chess scores
+
+TOKEN = re.compile(r"""\s*(?:
+    (?P<tag>\[\s*(?P<name>\w+)\s+"(?P<value>(?:[^"\\]|\\.)*)"\s*\])
+  | (?P<result>(?:2-0|0-2|1-1|1-0|0-1|1/2-1/2|\*)(?![\dx-]))
+  | (?P<move>\d+(?:[-x:]\d+)+)
+  | (?P<number>\d+\.+)
+  | (?P<comment>\{)
+  | (?P<open>\()
+  | (?P<close>\))
+  | (?P<rest>;.*)
+  | (?P<annotation>\$\d+|[!?]+)
+  | (?P<other>\S+)
+)""", re.VERBOSE)
+
+
+class Game:
+    """one game from a PDN file: its tags, its moves as text and its result"""
+    def __init__(self, tags=None, moves=None, result="*", line=0):
+        self.tags = tags if tags is not None else {} # in the order they were read, which is also the order they're written
+        self.moves = moves if moves is not None else []
+        self.result = result
+        self.line = line # where the game starts in its file, for error messages
+
+    @classmethod
+    def fromBoard(cls, board, result=None, tags=None): # this is how the window or anything else playing on a Board saves its game
+        """returns the game played on board so far, from wherever the board was set up; the result is worked out from the board unless it's given"""
+        if result is None:
+            if not board.validMoves: # if there are no moves left you lose
+                result = "0-2" if board.currentTeam == 1 else "2-0"
+            else:
+                result = "1-1" if board.isDraw() else "*"
+        start = board.copy()
+        moves = []
+        while start.history:
+            moves.append(str(start.unmakeMove()))
+        moves.reverse()
+        game = cls(dict(tags or {}), moves, result)
+        game.size = tuple(board.size)
+        if start.fen() != Board(list(board.size)).fen():
+            game.tags["FEN"] = start.fen()
+        return game
+
+    @property
+    def size(self): # GameType 20 is international draughts; anything else says its size as "20,W,width,height,N2,0"
+        fields = self.tags.get("GameType", "20").split(",")
+        if len(fields) >= 4 and fields[2].strip().isdigit() and fields[3].strip().isdigit():
+            return int(fields[2]), int(fields[3])
+        return 10, 10
+
+    @size.setter
+    def size(self, size):
+        if tuple(size) == (10, 10):
+            self.tags.pop("GameType", None)
+        else:
+            self.tags["GameType"] = f"20,W,{size[0]},{size[1]},N2,0"
+
+    @property
+    def winner(self):
+        """returns 1 if white won, -1 if black won, 0 for a draw or None if the game wasn't finished"""
+        return RESULTS.get(self.result)
+
+    def board(self):
+        """returns a board set up for the start of the game"""
+        if "FEN" in self.tags:
+            return Board.fromFen(self.tags["FEN"], self.size)
+        return Board(list(self.size))
+
+    def __str__(self):
+        return "".join(formatGame(self))
+
+def readGames(lines): # lines can be an open file, which we only ever read a line at a time
+    """yields every Game in some PDN text"""
+    game = Game(line=1)
+    started = False # whether anything but tags has been read for this game
+    comment = False
+    depth = 0 # how deep we are in variations, which we skip as only the main line gets played
+    for number, line in enumerate(lines, 1):
+        if number == 1:
+            line = line.lstrip("\ufeff") # a byte-order mark would hide the first tag, in case whoever opened the file didn't use utf-8-sig
+        if line.startswith("%"): # an escape line, which is for other programs
+            continue
+        position = 0
+        while position < len(line):
+            if comment: # comments can go on for several lines
+                end = line.find("}", position)
+                if end < 0:
+                    break
+                comment = False
+                position = end + 1
+                continue
+            match = TOKEN.match(line, position)
+            if match is None: # nothing but space left
+                break
+            position = match.end()
+            kind = match.lastgroup
+            if kind == "comment":
+                comment = True
+            elif kind == "open":
+                depth += 1
+            elif kind == "close":
+                depth = max(depth - 1, 0)
+            elif kind == "rest":
+                break
+            elif depth:
+                continue
+            elif kind == "tag":
+                if started: # a new game without the last one having a result
+                    yield game
+                    game = Game(line=number)
+                    started = False
+                if not game.tags and not game.moves:
+                    game.line = number
+                value = match.group("value").replace('\\"', '"').replace("\\\\", "\\")
+                game.tags[match.group("name")] = value
+            elif kind == "result":
+                game.result = OLD_RESULTS.get(match.group("result"), match.group("result"))
+                yield game
+                game = Game(line=number)
+                started = False
+            elif kind == "move":
+                if not started and not game.tags:
+                    game.line = number
+                game.moves.append(match.group("move").replace(":", "x"))
+                started = True
+    if started or game.tags: # the file ended without a result
+        if "Result" in game.tags:
+            game.result = OLD_RESULTS.get(game.tags["Result"], game.tags["Result"])
+        yield game
+
+def formatGame(game, width=79):
+    """yields the lines of a game in PDN"""
+    tags = dict(game.tags)
+    tags["Result"] = game.result
+    for name, value in tags.items():
+        value = value.replace("\\", "\\\\").replace('"', '\\"')
+        yield f'[{name} "{value}"]\n'
+    yield "\n"
+
+    black = tags.get("FEN", "W").strip('"').strip().upper().startswith("B") # black going first means the first move is 1...
+    words = []
+    for ply, move in enumerate(game.moves): # a move number stays on the same line as its move
+        half = ply + black
+        if half % 2 == 0:
+            words.append(f"{half // 2 + 1}. {move}")
+        elif ply == 0:
+            words.append(f"{half // 2 + 1}... {move}")
+        else:
+            words.append(move)
+    words.append(game.result)
+
+    line = ""
+    for word in words:
+        if line and len(line) + 1 + len(word) > width:
+            yield line + "\n"
+            line = word
+        else:
+            line = f"{line} {word}" if line else word
+    yield line + "\n\n"
+
+def writeGames(games, out):
+    """writes every game in games to out as PDN and returns how many there were"""
+    count = 0
+    for game in games:
+        out.writelines(formatGame(game))
+        count += 1
+    return count
+
+
+# ================================ Replaying ================================
+
+def replay(game):
+    """plays through a game and returns (the board at the end, None), or (the board before the bad move, (ply, move, reason)) for the first move that can't be played"""
+    try:
+        board = game.board()
+    except ValueError as error:
+        return None, (0, game.tags.get("FEN", ""), f"bad FEN: {error}")
+    for ply, movetext in enumerate(game.moves):
+        if board.move(movetext):
+            continue
+        if not board.validMoves:
+            reason = "the game was already over"
+        else:
+            parts = re.split("[-x]", movetext)
+            matches = [move for move in board.validMoves if str(move.start + 1) == parts[0] and str(move.end + 1) == parts[-1]]
+            reason = "ambiguous, more than one take goes there" if len(matches) > 1 and "x" in movetext else "not a legal move"
+        return board, (ply, movetext, reason)
+    return board, None
+
+def moveNumber(board, ply): # what a person would call the move, e.g. 12... for black's 12th
+    """returns the PDN move number of ply moves after the start of the game on board"""
+    first = board.history[0][3] if board.history else board.currentTeam
+    ply += first == -1 # black going first means ply 0 is the second half of move 1
+    return f"{ply // 2 + 1}{'.' if ply % 2 == 0 else '...'}"
+
+def checkFile(path, maxErrors=20): # this runs in the worker processes
+    """replays every game in a file, and returns a summary with the first bad move of each of the first maxErrors games that have one"""
+    start = time.perf_counter()
+    summary = {"file": path, "games": 0, "moves": 0, "bad": 0, "errors": [], "unreadable": None}
+    try:
+        with open(path, encoding="utf-8-sig", errors="replace") as file:
+            for index, game in enumerate(readGames(file)):
+                summary["games"] += 1
+                board, error = replay(game)
+                if error is None:
+                    summary["moves"] += len(game.moves)
+                    continue
+                ply, movetext, reason = error
+                summary["moves"] += ply
+                summary["bad"] += 1
+                if len(summary["errors"]) >= maxErrors: # a big collection could have millions, and they all have to come back in one go
+                    continue
+                summary["errors"].append({
+                    "game": index + 1,
+                    "line": game.line,
+                    "move": f"{moveNumber(board, ply) if board else ''} {movetext}".strip(),
+                    "reason": reason,
+                })
+    except OSError as error: # one missing file shouldn't stop the rest being checked
+        summary["unreadable"] = error.strerror or str(error)
+    summary["seconds"] = time.perf_counter() - start
+    return summary
+
+def checkFiles(paths, workers=None, report=None, maxErrors=20): # every file is one task, so a big collection split into several files gets checked on every core
+    """replays every game in every file across a pool of workers, calling report with each file's summary (with up to maxErrors bad games in it) as it finishes, and returns the totals"""
+    start = time.perf_counter()
+    totals = {"files": 0, "games": 0, "moves": 0, "bad": 0, "unreadable": 0}
+    paths = iter(paths)
+    workers = workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(workers) as executor:
+        pending = set()
+        while True:
+            for path in paths:
+                pending.add(executor.submit(checkFile, path, maxErrors))
+                if len(pending) >= 2 * workers:
+                    break
+            if not pending:
+                break
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                summary = future.result()
+                totals["files"] += 1
+                for key in ("games", "moves", "bad"):
+                    totals[key] += summary[key]
+                totals["unreadable"] += summary["unreadable"] is not None
+                if report:
+                    report(summary)
+    totals["seconds"] = time.perf_counter() - start
+    totals["gamesPerSecond"] = totals["games"] / totals["seconds"] if totals["seconds"] > 0 else 0.0
+    return totals
+
+# a few games with most of the awkward bits real files have, and the tags, moves and result that should be read from each
+SAMPLE = (
+    "\ufeff[FEN \"B:W31,32:B19,K5\"]\r\n" # if the byte-order mark hid this tag the moves wouldn't be legal any more
+    "[Event \"black first\"]\r\n"
+    "1... 19-23 2. 32-28 23x32 2-0\r\n"
+    "[Event \"first\"]\r\n"
+    "[White \"a \\\"quoted\\\" name\"]\r\n"
+    "\r\n"
+    "1. 32-28 19-23 {a comment\r\n"
+    "over two lines} 2. 28x19 (2. 33-29 (2. 34-29) 23x34) 14x23! 3. 37-32 $2 ; the rest of the line\r\n"
+    "1-0\r\n"
+    "% an escape line, for other programs\r\n"
+    "[Event \"8x8\"]\r\n"
+    "[GameType \"20,W,8,8,N2,0\"]\r\n"
+    "1. 22-18 11-15 2. 18x11 8x15 1/2-1/2\r\n"
+    "[Event \"short captures\"]\r\n"
+    "[FEN \"B:W31,32,33,37,41,42,43,44,45,46,48:B5,6,7,10,12,14,15,16,25,29,35\"]\r\n"
+    "1... 29x40 2. 45x34 *\r\n"
+    "[Event \"no result\"]\r\n"
+    "1. 32-28\r\n"
+)
+SAMPLE_GAMES = [
+    ({"FEN": "B:W31,32:B19,K5", "Event": "black first"}, ["19-23", "32-28", "23x32"], "2-0"),
+    ({"Event": "first", "White": 'a "quoted" name'}, ["32-28", "19-23", "28x19", "14x23", "37-32"], "2-0"),
+    ({"Event": "8x8", "GameType": "20,W,8,8,N2,0"}, ["22-18", "11-15", "18x11", "8x15"], "1-1"),
+    ({"Event": "short captures", "FEN": "B:W31,32,33,37,41,42,43,44,45,46,48:B5,6,7,10,12,14,15,16,25,29,35"}, ["29x40", "45x34"], "*"), # 29x38x47x36x27x38x49x40
+    ({"Event": "no result"}, ["32-28"], "*"),
+]
+
+def test(out=print): # the PDN version of perft --check, run it after changing anything in here
+    """reads SAMPLE (with a byte-order mark and CRLF line ends), checks what comes out, writes it back and reads it again, checks it from a file, and returns how many things were wrong"""
+    failures = 0
+    def expect(what, found, expected):
+        nonlocal failures
+        if found != expected:
+            failures += 1
+            out(f"{what}: got {found!r}, expected {expected!r}")
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "sample.pdn")
+        with open(path, "w", encoding="utf-8", newline="") as file:
+            file.write(SAMPLE)
+        games = list(readGames(io.StringIO(SAMPLE, newline=""))) # straight from the text, so readGames sees the byte-order mark and the \r\n
+        expect("games read", len(games), len(SAMPLE_GAMES))
+        for game, (tags, moves, result) in zip(games, SAMPLE_GAMES):
+            name = tags.get("Event")
+            expect(f"{name} tags", game.tags, tags)
+            expect(f"{name} moves", game.moves, moves)
+            expect(f"{name} result", game.result, result)
+            expect(f"{name} replay", replay(game)[1], None)
+        again = list(readGames(io.StringIO("".join(str(game) for game in games))))
+        for game in again:
+            del game.tags["Result"] # formatGame always writes one
+        expect("written and read again", [(game.tags, game.moves, game.result) for game in again], [(game.tags, game.moves, game.result) for game in games])
+        summary = checkFile(path)
+        expect("checkFile", (summary["games"], summary["bad"]), (len(SAMPLE_GAMES), 0))
+    out(f"{len(SAMPLE_GAMES)} sample games, {failures} things wrong")
+    return failures
+
+def main(arguments=None): # python -m draughts.pdn
+    parser = argparse.ArgumentParser(description="check or rewrite PDN game collections")
+    commands = parser.add_subparsers(dest="command", required=True)
+    check = commands.add_parser("check", help="play through every game and report the first illegal move in each")
+    check.add_argument("files", nargs="+")
+    check.add_argument("--workers", type=int, default=None, help="worker processes (default: one per core)")
+    check.add_argument("--quiet", action="store_true", help="only print the totals")
+    check.add_argument("--errors", type=int, default=20, help="bad games to show per file (they're all counted)")
+    commands.add_parser("test", help="check the reader against a sample with comments, variations, a byte-order mark and so on")
+    copy = commands.add_parser("copy", help="read games and write them back out tidied up, e.g. to check a file reads properly")
+    copy.add_argument("files", nargs="+")
+    copy.add_argument("--out", default="-", help="file to write to (default: standard output)")
+    options = parser.parse_args(arguments)
+
+    if options.command == "test":
+        return 1 if test() else 0
+    if options.command == "copy":
+        out = sys.stdout if options.out == "-" else open(options.out, "w")
+        try:
+            for path in options.files:
+                with open(path, encoding="utf-8-sig", errors="replace") as file:
+                    writeGames(readGames(file), out)
+        finally:
+            if out is not sys.stdout:
+                out.close()
+        return 0
+
+    def report(summary):
+        if summary["unreadable"]:
+            print(f"{summary['file']}: {summary['unreadable']}")
+            return
+        if options.quiet:
+            return
+        print(f"{summary['file']}: {summary['games']} games, {summary['bad']} bad ({summary['seconds']:.2f}s)")
+        for error in summary["errors"]:
+            print(f"  game {error['game']} (line {error['line']}): {error['move']}: {error['reason']}")
+        if summary["bad"] > len(summary["errors"]):
+            print(f"  and {summary['bad'] - len(summary['errors'])} more")
+    totals = checkFiles(options.files, options.workers, report, options.errors)
+    print(f"{totals['games']} games ({totals['moves']} moves) in {totals['files']} files in {totals['seconds']:.2f}s "
+          f"({totals['gamesPerSecond']:.1f} games/s), {totals['bad']} with illegal moves, {totals['unreadable']} files unreadable")
+    return 1 if totals["bad"] or totals["unreadable"] else 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,111 @@
+# perft counts every position a given number of moves ahead, which checks the move generator and tells us how fast it is
+
+import argparse
+import time
+
+from .board import Board
+from .stats import session
+
+# (name, board size, FEN, expected counts for depth 1, 2, ...)
+# the start positions agree with the published international draughts numbers as far as kings don't matter, the rest
+# were checked against a simple (slow) generator that works on co-ordinates instead of bits
+REFERENCE = [
+    ("start", (10, 10), "W:W31-50:B1-20", [9, 81, 658, 4265, 27117, 167140]),
+    ("start 8x8", (8, 8), "W:W21-32:B1-12", [7, 49, 302, 1469, 7473, 37628, 187302]),
+    ("start 6x6", (6, 6), "W:W13-18:B1-6", [5, 25, 106, 369, 1301, 4214, 12923]),
+    ("start 20x20", (20, 20), "W:W111-200:B1-90", [19, 361, 6518, 102485]),
+    ("thirteen piece chain", (20, 20), "B:W105-109,111,114,118,122,126,130,131,135,137,138,141-145,150,152,154,157,158,160-166,171,172,173,177,179-182,184,185,188,191,193:B11,12,17,19,23,27,28,29,33,34,36-39,46,52,53,57,60,62,63,69,78,81,83,84,85,100", [2, 77, 2630, 91608]),
+    ("seven piece chain", (10, 10), "B:W31,32,33,37,41,42,43,44,45,46,48:B5,6,7,10,12,14,15,16,25,29,35", [1, 1, 10, 58, 520, 2996]),
+    ("chain into a crowd", (10, 10), "W:W18,23,24,28,29,38,39,41,42,43,44,45,46,50:B3,5,6,7,8,9,10,17,20,27", [1, 4, 64, 279, 3696, 17028]),
+    ("round trip", (10, 10), "W:W26,27,30,31,35,37,38,39,40,41,43,44,45,46,47,48:B2,3,4,5,8,9,10,11,12,17,19,21,22,24,29", [1, 12, 97, 860, 6286, 52773]), # 27 can take four and land back on 27, going round either way
+    ("kings", (10, 10), "W:WK9,K16:B25,30,38,40,K45", [6, 36, 216, 1371, 9138, 61551]),
+    ("kings and men", (10, 10), "B:WK2,16:B6,14,K26,29", [7, 17, 90, 350, 1974, 6408, 36073]),
+    ("lattice", (14, 14), "W:WK39:B1-7,15-21,29-35,43-49,57-63,71-77,85-91", [1, 19, 76, 1392, 5568]), # the king takes 36 in a huge number of orders, which only stays quick if each (square, taken) is only looked at once
+]
+
+# FEN that has to come back out of Board.fromFen(...).fen() just as it went in, including a side with nothing left
+FENS = ["W:W31,32,33:B1,2,3", "B:WK2,16:B6,14,K26,29", "B:W:B5", "W:W:BK5", "B:W28:B", "W:WK1:B"]
+
+
+def perft(board, depth): # we use the undo stack rather than copying, the same way the search does
+    """returns the number of positions exactly depth moves ahead of board"""
+    moves = board.findValidMoves()
+    if depth <= 1:
+        return len(moves) if depth == 1 else 1
+    count = 0
+    for move in moves:
+        board.makeMove(move)
+        count += perft(board, depth - 1)
+        board.unmakeMove()
+    return count
+
+def divide(board, depth):
+    """returns a list of (move, count) with the perft count under each move, for finding which move a wrong count comes from"""
+    counts = []
+    for move in board.findValidMoves():
+        board.makeMove(move)
+        counts.append((move, perft(board, depth - 1)))
+        board.unmakeMove()
+    return counts
+
+def check(maxDepth=None, cache=True, out=print): # the whole suite, this should be run before and after any change to the move generator
+    """runs perft on every reference position and returns the number of counts that were wrong"""
+    failures = 0
+    for fen in FENS:
+        found = Board.fromFen(fen).fen()
+        if found != fen:
+            failures += 1
+            out(f"FEN {fen} came back as {found}, WRONG")
+    for name, size, fen, expected in REFERENCE:
+        board = Board.fromFen(fen, size)
+        if not cache:
+            board.geometry.moveCache.maxSize = 0
+        for depth, count in enumerate(expected, 1):
+            if maxDepth is not None and depth > maxDepth:
+                break
+            start = time.perf_counter()
+            found = perft(board, depth)
+            seconds = time.perf_counter() - start
+            status = "ok" if found == count else f"WRONG, expected {count}"
+            if found != count:
+                failures += 1
+            out(f"{name:20} depth {depth}: {found:>8} {status} ({seconds:.2f}s)")
+    return failures
+
+def main(arguments=None): # python -m draughts.perft
+    parser = argparse.ArgumentParser(description="count positions a number of moves ahead, and how quickly we can")
+    parser.add_argument("depth", type=int, nargs="?", default=None, help="how many moves ahead to count (default 5, or every depth with --check)")
+    parser.add_argument("--fen", default=None, help="position to start from (default: the start position)")
+    parser.add_argument("--size", type=int, nargs=2, default=[10, 10], metavar=("WIDTH", "HEIGHT"))
+    parser.add_argument("--divide", action="store_true", help="print the count under each move")
+    parser.add_argument("--check", action="store_true", help="run the reference positions and check their counts")
+    parser.add_argument("--no-cache", action="store_true", help="work out every position's moves from scratch")
+    parser.add_argument("--stats", action="store_true", help="count and time what the move generator does, and print it at the end")
+    parser.add_argument("--profile", default=None, metavar="FILE", help="run cProfile as well and save it to FILE for python -m pstats")
+    options = parser.parse_args(arguments)
+
+    with session(options.stats, options.profile):
+        if options.check:
+            failures = check(options.depth, not options.no_cache)
+            print("all counts ok" if not failures else f"{failures} wrong counts")
+            return 1 if failures else 0
+
+        board = Board.fromFen(options.fen, options.size) if options.fen else Board(options.size)
+        if options.no_cache:
+            board.geometry.moveCache.maxSize = 0
+        depth = options.depth or 5
+
+        start = time.perf_counter()
+        if options.divide:
+            total = 0
+            for move, count in divide(board, depth):
+                print(f"{move}: {count}")
+                total += count
+        else:
+            total = perft(board, depth)
+        seconds = time.perf_counter() - start
+        print(f"perft({depth}) = {total} in {seconds:.3f}s ({total / seconds if seconds > 0 else 0:.0f} nodes/s)")
+        return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
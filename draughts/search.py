@@ -0,0 +1,284 @@
+# the computer player: negamax with alpha-beta, iterative deepening and a transposition table
+
+import argparse
+import random
+import threading
+import time
+
+from .board import Board
+from .stats import session
+
+WIN = 100000 # anything within maxPly of this is a forced win
+MAN = 100
+KING = 300
+
+EXACT, LOWER, UPPER = 0, 1, 2 # what a stored score means: the real score, at least this, or at most this
+
+
+class SearchTimeout(Exception): # thrown out of the middle of the tree when we run out of time
+    pass
+
+class Evaluator: # scores a position for the team whose turn it is; one per board size, as it needs some masks
+    """material and advancement evaluation for one board size"""
+    _cache = {}
+
+    @classmethod
+    def get(cls, geometry):
+        if geometry.size not in cls._cache:
+            cls._cache[geometry.size] = cls(geometry)
+        return cls._cache[geometry.size]
+
+    def __init__(self, geometry):
+        rows = geometry.size[1]
+        # how far a man has come from its own back row, split up by bit so we only need a few popcounts:
+        # advancement = sum(popcount(men & masks[k]) << k)
+        self.whiteMasks = []
+        self.blackMasks = []
+        for k in range((rows - 1).bit_length()):
+            white = 0
+            black = 0
+            for i in range(geometry.squares):
+                row = i // geometry.width
+                if (rows - 1 - row) >> k & 1:
+                    white |= 1 << i
+                if row >> k & 1:
+                    black |= 1 << i
+            self.whiteMasks.append(white)
+            self.blackMasks.append(black)
+
+    def evaluate(self, board):
+        """returns the score of the position for the team whose turn it is, in hundredths of a man"""
+        kings = board.kings
+        whiteMen = board.white & ~kings
+        blackMen = board.black & ~kings
+        score = MAN * (whiteMen.bit_count() - blackMen.bit_count()) + KING * ((board.white & kings).bit_count() - (board.black & kings).bit_count())
+        for k, (whiteMask, blackMask) in enumerate(zip(self.whiteMasks, self.blackMasks)):
+            score += ((whiteMen & whiteMask).bit_count() - (blackMen & blackMask).bit_count()) << k
+        return score * board.currentTeam
+
+class SearchResult:
+    def __init__(self, move, score, depth, nodes, seconds, pv):
+        self.move = move # the best move, or None if there are no moves
+        self.score = score # for the team to move
+        self.depth = depth # the deepest search that finished
+        self.nodes = nodes
+        self.seconds = seconds
+        self.pv = pv # the principal variation, the line both sides are expected to play
+
+    @property
+    def nps(self):
+        return self.nodes / self.seconds if self.seconds > 0 else 0.0
+
+    def __str__(self):
+        return f"depth {self.depth} score {self.score} nodes {self.nodes} nps {self.nps:.0f} pv {' '.join(str(move) for move in self.pv)}"
+
+class Engine:
+    def __init__(self, tableSize=1 << 18, seed=None, tablebase=None):
+        self.tableSize = 1 << (tableSize - 1).bit_length() # a power of two so the index is just a mask
+        self.table = [None] * self.tableSize # entries are (hash, depth, score, flag, move, generation)
+        self.random = random.Random(seed) # only used to break ties between root moves, so a seed makes games repeatable
+        self.generation = 0 # which search an entry came from, so old entries get replaced first
+        self.nodes = 0
+        self.deadline = None
+        self.nodeLimit = None
+        self.stopped = threading.Event() # set from another thread to make the search give up as soon as it can
+        self.tablebase = tablebase # a tablebase.Tablebase, for knowing the answer once there are only a few pieces left
+
+    def stop(self):
+        """makes a search running in another thread finish early, returning the deepest result it has (if no search is running, the next one stops straight away)"""
+        self.stopped.set()
+
+    def clear(self):
+        """forgets everything in the transposition table"""
+        self.table = [None] * self.tableSize
+
+    def bestMove(self, board, seconds=1.0, maxDepth=64, nodeLimit=None):
+        """returns the move the engine would play, or None if there aren't any"""
+        return self.search(board, seconds, maxDepth, nodeLimit).move
+
+    def search(self, board, seconds=1.0, maxDepth=64, nodeLimit=None, info=None): # seconds or nodeLimit can be None for no limit; use maxDepth or nodeLimit (not time) if you need the same answer every time
+        """searches deeper and deeper until the time, node or depth limit runs out, calling info with a SearchResult after each depth, and returns the last SearchResult"""
+        board = board.copy() # we move pieces around in place, so the caller's board is left alone
+        start = time.perf_counter()
+        self.deadline = start + seconds if seconds is not None else None
+        self.nodeLimit = nodeLimit
+        self.nodes = 0
+        self.generation += 1
+        evaluator = Evaluator.get(board.geometry)
+
+        rootMoves = board.findValidMoves()
+        self.random.shuffle(rootMoves) # this is where the seed comes in
+        result = SearchResult(rootMoves[0] if rootMoves else None, 0, 0, 0, 0.0, rootMoves[:1])
+        if len(rootMoves) <= 1: # there's nothing to think about
+            return result
+
+        try:
+            for depth in range(1, maxDepth + 1):
+                try:
+                    score, move = self.searchRoot(board, rootMoves, depth, evaluator)
+                except SearchTimeout:
+                    break
+                rootMoves.remove(move) # search the best move first next time
+                rootMoves.insert(0, move)
+                result = SearchResult(move, score, depth, self.nodes, time.perf_counter() - start, self.principalVariation(board, move))
+                if info:
+                    info(result)
+                if abs(score) >= WIN - 1000: # we've found a forced result, looking deeper won't change it
+                    break
+        finally:
+            self.stopped.clear() # a stop only ever ends one search
+
+        result.nodes = self.nodes
+        result.seconds = time.perf_counter() - start
+        return result
+
+    def searchRoot(self, board, moves, depth, evaluator):
+        alpha = -WIN - 1
+        bestMove = moves[0]
+        for move in moves:
+            board.makeMove(move)
+            score = -self.negamax(board, depth - 1, -WIN - 1, -alpha, 1, evaluator)
+            board.unmakeMove()
+            if score > alpha:
+                alpha = score
+                bestMove = move
+        self.store(board, depth, alpha, EXACT, bestMove, 0)
+        return alpha, bestMove
+
+    def negamax(self, board, depth, alpha, beta, ply, evaluator):
+        self.nodes += 1
+        if not self.nodes & 255: # looking at the clock every node would be slow
+            if self.stopped.is_set() or (self.deadline is not None and time.perf_counter() > self.deadline):
+                raise SearchTimeout
+        if self.nodeLimit is not None and self.nodes > self.nodeLimit:
+            raise SearchTimeout
+
+        tablebase = self.tablebase
+        if tablebase is not None and (board.white | board.black).bit_count() <= tablebase.maxPieces and tablebase.geometry is board.geometry:
+            found = tablebase.probe(board)
+            if found is not None:
+                result, moves = found
+                return result * (WIN - ply - moves) # the quicker the win (or the slower the loss) the better
+
+        if depth <= 0 and not board.findJumpers(): # captures are forced, so we keep going until the position is quiet
+            return evaluator.evaluate(board)
+
+        if board.history[-1][5] and board.repetitions() > 1: # going back to a position we've already been in can only be a draw
+            return 0
+
+        key = board.hash
+        entry = self.table[key & (self.tableSize - 1)]
+        tableMove = None
+        if entry is not None and entry[0] == key:
+            tableMove = entry[4]
+            if entry[1] >= depth:
+                score = entry[2]
+                if score >= WIN - 1000: # wins are stored as distance from this node, so we put the ply back
+                    score -= ply
+                elif score <= -WIN + 1000:
+                    score += ply
+                if entry[3] == EXACT:
+                    return score
+                if entry[3] == LOWER and score >= beta:
+                    return score
+                if entry[3] == UPPER and score <= alpha:
+                    return score
+
+        moves = board.findValidMoves()
+        if not moves: # if there are no moves left you lose
+            return -WIN + ply
+        if len(moves) > 1:
+            if moves[0].captured: # all the moves take the same number of pieces, so prefer taking kings
+                kings = board.kings
+                moves.sort(key=lambda move: (move.captured & kings).bit_count(), reverse=True)
+            if tableMove is not None and tableMove in moves: # the best move last time is probably still good
+                moves.remove(tableMove)
+                moves.insert(0, tableMove)
+
+        originalAlpha = alpha
+        best = -WIN - 1
+        bestMove = moves[0]
+        for move in moves:
+            board.makeMove(move)
+            score = -self.negamax(board, depth - 1, -beta, -alpha, ply + 1, evaluator)
+            board.unmakeMove()
+            if score > best:
+                best = score
+                bestMove = move
+                if score > alpha:
+                    alpha = score
+                    if alpha >= beta:
+                        break
+
+        if best <= originalAlpha:
+            flag = UPPER
+        elif best >= beta:
+            flag = LOWER
+        else:
+            flag = EXACT
+        self.store(board, depth, best, flag, bestMove, ply)
+        return best
+
+    def store(self, board, depth, score, flag, move, ply):
+        key = board.hash
+        index = key & (self.tableSize - 1)
+        entry = self.table[index]
+        # keep deeper results from this search, but anything from an older search can go
+        if entry is None or entry[0] == key or entry[5] != self.generation or depth >= entry[1]:
+            if score >= WIN - 1000:
+                score += ply
+            elif score <= -WIN + 1000:
+                score -= ply
+            self.table[index] = (key, depth, score, flag, move, self.generation)
+
+    def principalVariation(self, board, move, maxLength=32): # follow the best moves through the table
+        """returns the expected line starting with move"""
+        pv = [move]
+        board.makeMove(move)
+        seen = {board.hash}
+        while len(pv) < maxLength:
+            key = board.hash
+            entry = self.table[key & (self.tableSize - 1)]
+            if entry is None or entry[0] != key or entry[4] not in board.findValidMoves():
+                break
+            pv.append(entry[4])
+            board.makeMove(entry[4])
+            key = board.hash
+            if key in seen: # kings can go round in circles forever
+                break
+            seen.add(key)
+        for _ in pv:
+            board.unmakeMove()
+        return pv
+
+
+def main(arguments=None): # analysis mode: python -m draughts.search
+    parser = argparse.ArgumentParser(description="search a position and print each depth as it finishes")
+    parser.add_argument("moves", nargs="*", help="moves to play from the start before searching, in long notation")
+    parser.add_argument("--size", type=int, nargs=2, default=[10, 10], metavar=("WIDTH", "HEIGHT"))
+    parser.add_argument("--time", type=float, default=5.0, help="seconds to think for")
+    parser.add_argument("--depth", type=int, default=64)
+    parser.add_argument("--nodes", type=int, default=None, help="stop after this many nodes (repeatable, unlike --time)")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--table", type=int, default=1 << 18, help="transposition table entries")
+    parser.add_argument("--tablebase", default=None, help="endgame tablebase file made with python -m draughts.tablebase")
+    parser.add_argument("--stats", action="store_true", help="count and time what the move generator does, and print it at the end")
+    parser.add_argument("--profile", default=None, metavar="FILE", help="run cProfile as well and save it to FILE for python -m pstats")
+    options = parser.parse_args(arguments)
+
+    board = Board(options.size)
+    for movetext in options.moves:
+        if not board.move(movetext):
+            parser.error(f"{movetext} isn't a valid move here")
+
+    tablebase = None
+    if options.tablebase:
+        from .tablebase import Tablebase
+        tablebase = Tablebase(options.tablebase)
+    engine = Engine(options.table, options.seed, tablebase)
+    with session(options.stats, options.profile):
+        result = engine.search(board, options.time, options.depth, options.nodes, info=print)
+    print(f"best {result.move} ({result.nodes} nodes in {result.seconds:.2f}s, {result.nps:.0f} nodes/s)")
+
+if __name__ == "__main__":
+    main()
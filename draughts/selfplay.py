@@ -0,0 +1,124 @@
+# plays lots of games against itself with no window, spread over every core, for opening statistics and engine tuning
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from .board import Board
+from .pdn import Game, formatGame
+from .search import Engine
+
+
+def gameSeed(seed, game): # every game gets its own seed, so any single game can be played again on its own
+    """returns the seed for game number game of a run started with seed"""
+    return random.Random(f"{seed}:{game}").getrandbits(32)
+
+def playGame(game, seed, size=(10, 10), policy="random", maxPlies=400, nodes=2000, seconds=None):
+    """plays one game and returns its result as a dictionary; the same seed and settings always give the same game unless seconds is set"""
+    board = Board(list(size))
+    generator = random.Random(seed)
+    engine = Engine(1 << 16, seed) if policy == "engine" else None
+    moves = []
+    reason = "move limit"
+    winner = 0
+    while len(moves) < maxPlies:
+        if not board.validMoves: # if there are no moves left you lose
+            winner = -board.currentTeam
+            reason = "no moves"
+            break
+        if board.isDraw():
+            reason = "repetition"
+            break
+        if engine:
+            move = engine.bestMove(board, seconds, nodeLimit=nodes)
+        else:
+            move = generator.choice(board.validMoves)
+        board.move(move)
+        moves.append(str(move))
+
+    return {
+        "game": game,
+        "seed": seed,
+        "winner": {1: "white", -1: "black", 0: None}[winner],
+        "result": {1: "2-0", -1: "0-2", 0: "1-1"}[winner], # PDN scores
+        "reason": reason,
+        "plies": len(moves),
+        "moves": moves,
+    }
+
+def playGames(games, seed, **settings): # one task for the pool; a few games at a time keeps the overhead of sending work around down
+    """plays each game number in games and returns the list of results"""
+    return [playGame(game, gameSeed(seed, game), **settings) for game in games]
+
+def toGame(result, size=(10, 10)):
+    """returns a result from playGame as a PDN Game"""
+    game = Game({"Event": "self-play", "Round": str(result["game"] + 1), "White": "draughts", "Black": "draughts",
+                 "Seed": str(result["seed"]), "Termination": result["reason"]}, result["moves"], result["result"])
+    game.size = size
+    return game
+
+def run(games, out, workers=None, seed=0, chunk=8, pdn=False, **settings): # results are written as soon as they come back, in whatever order that is
+    """plays games games across a pool of workers, writing each result to out as a line of JSON (or as PDN), and returns a summary"""
+    start = time.perf_counter()
+    summary = {"games": 0, "white": 0, "black": 0, "draws": 0, "plies": 0}
+    chunks = (range(first, min(first + chunk, games)) for first in range(0, games, chunk))
+    workers = workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(workers) as executor:
+        limit = 4 * workers # only a few tasks are waiting at once, so we never hold every game in memory
+        pending = set()
+        while True:
+            for batch in chunks:
+                pending.add(executor.submit(playGames, batch, seed, **settings))
+                if len(pending) >= limit:
+                    break
+            if not pending:
+                break
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                for result in future.result():
+                    if pdn:
+                        out.writelines(formatGame(toGame(result, settings.get("size", (10, 10)))))
+                    else:
+                        out.write(json.dumps(result) + "\n")
+                    summary["games"] += 1
+                    summary["plies"] += result["plies"]
+                    if result["winner"]:
+                        summary[result["winner"]] += 1
+                    else:
+                        summary["draws"] += 1
+            out.flush()
+    summary["seconds"] = time.perf_counter() - start
+    summary["gamesPerSecond"] = summary["games"] / summary["seconds"] if summary["seconds"] > 0 else 0.0
+    return summary
+
+def main(arguments=None): # python -m draughts.selfplay
+    parser = argparse.ArgumentParser(description="play games against ourselves and write them out as JSON lines or PDN")
+    parser.add_argument("games", type=int)
+    parser.add_argument("--out", default="-", help="file to write results to (default: standard output)")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: one per core)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--policy", choices=["random", "engine"], default="random")
+    parser.add_argument("--size", type=int, nargs=2, default=[10, 10], metavar=("WIDTH", "HEIGHT"))
+    parser.add_argument("--max-plies", type=int, default=400, help="call the game a draw after this many moves")
+    parser.add_argument("--nodes", type=int, default=2000, help="nodes per engine move, which keeps games repeatable")
+    parser.add_argument("--time", type=float, default=None, help="seconds per engine move instead (games won't be repeatable)")
+    parser.add_argument("--chunk", type=int, default=8, help="games per task sent to a worker")
+    parser.add_argument("--pdn", action="store_true", help="write the games as PDN instead, which python -m draughts.pdn can check")
+    options = parser.parse_args(arguments)
+
+    out = sys.stdout if options.out == "-" else open(options.out, "w")
+    try:
+        summary = run(options.games, out, options.workers, options.seed, options.chunk, options.pdn, size=tuple(options.size),
+                      policy=options.policy, maxPlies=options.max_plies, nodes=options.nodes, seconds=options.time)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    print(f"{summary['games']} games in {summary['seconds']:.2f}s ({summary['gamesPerSecond']:.1f} games/s): "
+          f"white {summary['white']}, black {summary['black']}, drawn {summary['draws']}", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
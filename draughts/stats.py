@@ -0,0 +1,170 @@
+# counts and times what the rules are doing, for finding out where the time goes
+# nothing is measured until enable() is called: it swaps timed versions in for the real methods, and disable() puts the
+# real ones back, so when it's off the rules run exactly the code they always do
+
+import cProfile
+import sys
+import time
+from contextlib import contextmanager
+
+from .board import Board, MoveCache
+
+TIMED = ("findValidMoves", "generateMoves", "findCaptures", "move", "makeMove", "unmakeMove") # the Board methods that get timed
+
+
+class Timer:
+    """how often something was called and how long it took altogether"""
+    __slots__ = ("calls", "seconds", "slowest")
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.calls = 0
+        self.seconds = 0.0
+        self.slowest = 0.0
+
+    def add(self, seconds):
+        self.calls += 1
+        self.seconds += seconds
+        if seconds > self.slowest:
+            self.slowest = seconds
+
+class Stats:
+    """everything measured since the last reset"""
+    def __init__(self):
+        self.timers = {name: Timer() for name in TIMED}
+        self.reset()
+
+    def reset(self): # the timers are changed in place, as the wrappers hold on to them
+        for timer in self.timers.values():
+            timer.reset()
+        self.chains = {} # pieces taken -> how many times findCaptures found moves taking that many
+        self.captureMoves = 0 # how many capture moves findCaptures returned altogether
+        self.cacheHits = 0
+        self.cacheMisses = 0
+        self.started = time.perf_counter()
+
+    def snapshot(self):
+        """returns everything measured so far as a dictionary of plain numbers, e.g. for writing out as JSON"""
+        searches = sum(self.chains.values())
+        lookups = self.cacheHits + self.cacheMisses
+        return {
+            "enabled": bool(_originals),
+            "seconds": time.perf_counter() - self.started,
+            "calls": {name: {
+                "calls": timer.calls,
+                "seconds": timer.seconds,
+                "average": timer.seconds / timer.calls if timer.calls else 0.0,
+                "slowest": timer.slowest,
+            } for name, timer in self.timers.items()},
+            "captures": {
+                "searches": searches, # calls to findCaptures
+                "moves": self.captureMoves,
+                "chains": dict(sorted(self.chains.items())), # the longest chain (and so the depth the search reached) of each call
+                "longest": max(self.chains, default=0),
+                "average": sum(length * count for length, count in self.chains.items()) / searches if searches else 0.0,
+            },
+            "moveCache": {
+                "hits": self.cacheHits,
+                "misses": self.cacheMisses,
+                "hitRate": self.cacheHits / lookups if lookups else 0.0,
+            },
+        }
+
+stats = Stats()
+_originals = {} # name -> the real method, while we're enabled
+
+
+def timed(function, timer): # the same wrapper for every timed method, with perf_counter looked up once
+    clock = time.perf_counter
+    def wrapper(*arguments):
+        start = clock()
+        result = function(*arguments)
+        timer.add(clock() - start)
+        return result
+    wrapper.__name__ = function.__name__
+    wrapper.__doc__ = function.__doc__
+    wrapper.__wrapped__ = function
+    return wrapper
+
+def enable():
+    """starts counting, replacing the Board and MoveCache methods with measured ones (does nothing if it's already on)"""
+    if _originals:
+        return
+    for name in TIMED:
+        _originals[name] = getattr(Board, name)
+        setattr(Board, name, timed(_originals[name], stats.timers[name]))
+
+    timedCaptures = Board.findCaptures
+    def findCaptures(self, jumpers, empty, enemy): # the moves it finds all take the same number of pieces, so one look tells us how deep it went
+        moves = timedCaptures(self, jumpers, empty, enemy)
+        length = moves[0].captures if moves else 0
+        stats.chains[length] = stats.chains.get(length, 0) + 1
+        stats.captureMoves += len(moves)
+        return moves
+    findCaptures.__wrapped__ = timedCaptures
+    Board.findCaptures = findCaptures
+
+    _originals["cache"] = MoveCache.get
+    originalGet = MoveCache.get
+    def get(self, board):
+        moves = originalGet(self, board)
+        if moves is None:
+            stats.cacheMisses += 1
+        else:
+            stats.cacheHits += 1
+        return moves
+    get.__wrapped__ = originalGet
+    MoveCache.get = get
+
+def disable():
+    """stops counting and puts the real methods back; what was counted is kept until reset"""
+    if not _originals:
+        return
+    MoveCache.get = _originals.pop("cache")
+    for name, function in _originals.items():
+        setattr(Board, name, function)
+    _originals.clear()
+
+def reset():
+    stats.reset()
+
+def snapshot():
+    """returns everything measured since the last reset, see Stats.snapshot"""
+    return stats.snapshot()
+
+def report(snapshot): # for people, the snapshot itself is for programs
+    """returns a snapshot as a few lines of text"""
+    lines = [f"stats over {snapshot['seconds']:.2f}s (times include anything called from inside):"]
+    for name, timer in snapshot["calls"].items():
+        if timer["calls"]:
+            lines.append(f"  {name:15} {timer['calls']:>10} calls {timer['seconds']:8.3f}s "
+                         f"{timer['average'] * 1e6:8.2f}us each, slowest {timer['slowest'] * 1e6:.0f}us")
+    captures = snapshot["captures"]
+    if captures["searches"]:
+        chains = ", ".join(f"{length}: {count}" for length, count in captures["chains"].items())
+        lines.append(f"  captures: {captures['searches']} searches found {captures['moves']} moves, "
+                     f"longest chain {captures['longest']}, average {captures['average']:.2f} ({chains})")
+    cache = snapshot["moveCache"]
+    lines.append(f"  move cache: {cache['hits']} hits, {cache['misses']} misses ({cache['hitRate']:.1%} hit rate)")
+    return "\n".join(lines) + "\n"
+
+@contextmanager
+def session(measure=True, profile=None, out=sys.stderr): # what --stats and --profile do in the command line tools
+    """measures everything inside the with block, writing a report to out at the end, and if profile is a path runs cProfile too and saves what it found there for pstats"""
+    if measure:
+        reset()
+        enable()
+    profiler = cProfile.Profile() if profile else None
+    if profiler:
+        profiler.enable()
+    try:
+        yield stats
+    finally:
+        if profiler:
+            profiler.disable()
+            profiler.dump_stats(profile) # python -m pstats FILE to look through it
+        if measure:
+            disable()
+            out.write(report(snapshot()))
@@ -0,0 +1,469 @@
+# endgame tablebases: every position with a few pieces solved once, offline, and then looked up from a file instead of searched
+#
+# positions are grouped by material (white men, white kings, black men, black kings), and each group is a table with one
+# 16 bit entry per position: 0 for a draw, the number of moves to win if the team to move wins, or 0x8000 plus the
+# number of moves it can hold out for if it loses. Moves are single moves by one side (plies).
+
+import argparse
+import mmap
+import os
+import struct
+import sys
+import tempfile
+import time
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from itertools import combinations, product
+from math import comb
+
+from .board import Board, Geometry, bits
+
+WIN, DRAW, LOSS = 1, 0, -1 # for the team to move
+LOST = 0x8000 # the bit that marks a loss in an entry
+
+MAGIC = b"DRTB"
+VERSION = 1
+HEADER = struct.Struct("<4sHHHHI") # magic, version, width, height, most pieces, number of tables
+ENTRY = struct.Struct("<BBBBQQ") # white men, white kings, black men, black kings, offset of the table, number of positions
+
+
+def signatures(maxPieces):
+    """returns every material signature with between 2 and maxPieces pieces and at least one each, in the order they have to be solved"""
+    found = []
+    for total in range(2, maxPieces + 1):
+        for whiteMen in range(total + 1):
+            for whiteKings in range(total + 1 - whiteMen):
+                for blackMen in range(total + 1 - whiteMen - whiteKings):
+                    blackKings = total - whiteMen - whiteKings - blackMen
+                    if whiteMen + whiteKings and blackMen + blackKings:
+                        found.append((whiteMen, whiteKings, blackMen, blackKings))
+    # taking a piece leads to fewer pieces and crowning leads to fewer men, so those tables have to come first
+    found.sort(key=lambda signature: (sum(signature), signature[0] + signature[2]))
+    return found
+
+def signatureOf(white, black, kings):
+    return ((white & ~kings).bit_count(), (white & kings).bit_count(), (black & ~kings).bit_count(), (black & kings).bit_count())
+
+class Indexer: # turns positions with a given material into numbers 0..size-1 and back
+    """numbers the positions of one material signature on one board size"""
+    def __init__(self, geometry, signature):
+        self.geometry = geometry
+        self.signature = signature
+        squares = geometry.squares
+        self.counts = [comb(squares, count) for count in signature]
+        self.size = self.counts[0] * self.counts[1] * self.counts[2] * self.counts[3] * 2 # the last factor is whose turn it is
+
+    def rank(self, mask): # the combinatorial number system: a set of squares s1 < s2 < ... gets C(s1, 1) + C(s2, 2) + ...
+        total = 0
+        for i, square in enumerate(bits(mask), 1):
+            total += comb(square, i)
+        return total
+
+    def unrank(self, rank, count):
+        mask = 0
+        square = self.geometry.squares
+        for i in range(count, 0, -1):
+            square -= 1
+            while comb(square, i) > rank:
+                square -= 1
+            rank -= comb(square, i)
+            mask |= 1 << square
+        return mask
+
+    def index(self, white, black, kings, team):
+        """returns the number of a position, which must have this indexer's material"""
+        index = self.rank(white & ~kings)
+        index = index * self.counts[1] + self.rank(white & kings)
+        index = index * self.counts[2] + self.rank(black & ~kings)
+        index = index * self.counts[3] + self.rank(black & kings)
+        return index * 2 + (team == -1)
+
+    def position(self, index):
+        """returns (white, black, kings, team) for a number, or None if the number isn't a real position"""
+        index, black = divmod(index, 2)
+        team = -1 if black else 1
+        index, blackKings = divmod(index, self.counts[3])
+        index, blackMen = divmod(index, self.counts[2])
+        whiteMen, whiteKings = divmod(index, self.counts[1])
+        masks = [self.unrank(rank, count) for rank, count in zip((whiteMen, whiteKings, blackMen, blackKings), self.signature)]
+        if masks[0] & masks[1] or (masks[0] | masks[1]) & (masks[2] | masks[3]) or masks[2] & masks[3]: # two pieces on one square
+            return None
+        geometry = self.geometry
+        if masks[0] & geometry.kingRows[1] or masks[2] & geometry.kingRows[-1]: # a man there would have been crowned
+            return None
+        return masks[0] | masks[1], masks[2] | masks[3], masks[1] | masks[3], team
+
+class Tables: # the lookup side, for both the finished file and the parts written while generating
+    """looks up positions in a set of solved tables"""
+    def __init__(self, geometry, tables=None):
+        self.geometry = geometry
+        self.tables = tables or {} # signature -> (buffer, offset in bytes, Indexer)
+        self.maxPieces = max((sum(signature) for signature in self.tables), default=0)
+
+    def add(self, signature, buffer, offset=0):
+        self.tables[signature] = (buffer, offset, Indexer(self.geometry, signature))
+        self.maxPieces = max(self.maxPieces, sum(signature))
+
+    def lookup(self, white, black, kings, team):
+        """returns the raw entry for a position, or None if it isn't in any table"""
+        own, other = (white, black) if team == 1 else (black, white)
+        if not own: # no pieces means no moves, which is a loss
+            return LOST
+        if not other:
+            return None # the other team has nothing left, this can't happen after a move
+        table = self.tables.get(signatureOf(white, black, kings))
+        if table is None:
+            return None
+        kingRows = self.geometry.kingRows
+        if white & ~kings & kingRows[1] or black & ~kings & kingRows[-1]: # these were never solved, see Indexer.position
+            return None
+        buffer, offset, indexer = table
+        return struct.unpack_from("<H", buffer, offset + 2 * indexer.index(white, black, kings, team))[0]
+
+    def probe(self, board):
+        """returns (WIN, LOSS or DRAW for the team to move, moves until the game ends) or None if the position isn't covered"""
+        entry = self.lookup(board.white, board.black, board.kings, board.currentTeam)
+        return decode(entry) if entry is not None else None
+
+def decode(entry):
+    if entry == 0:
+        return DRAW, 0
+    if entry & LOST:
+        return LOSS, entry & ~LOST
+    return WIN, entry
+
+class Tablebase(Tables): # the file is mapped into memory, so only the pages we look at are ever read
+    """a finished tablebase file, opened with mmap"""
+    def __init__(self, path):
+        self.file = open(path, "rb")
+        try:
+            self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError): # an empty file can't be mapped
+            self.file.close()
+            raise
+        try:
+            self.read(path)
+        except Exception: # don't leave the file open if it isn't one of ours
+            self.close()
+            raise
+
+    def read(self, path): # the header and the directory of tables
+        if len(self.map) < HEADER.size:
+            raise ValueError(f"{path} isn't a version {VERSION} draughts tablebase")
+        magic, version, width, height, maxPieces, count = HEADER.unpack_from(self.map, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} isn't a version {VERSION} draughts tablebase")
+        super().__init__(Geometry.get((width, height)))
+        if HEADER.size + count * ENTRY.size > len(self.map):
+            raise ValueError(f"{path} is cut short")
+        for i in range(count):
+            whiteMen, whiteKings, blackMen, blackKings, offset, size = ENTRY.unpack_from(self.map, HEADER.size + i * ENTRY.size)
+            signature = (whiteMen, whiteKings, blackMen, blackKings)
+            if size != Indexer(self.geometry, signature).size or offset + 2 * size > len(self.map): # a table from another board size, or a broken file
+                raise ValueError(f"{path} has a bad table for {signature} on a {width}x{height} board")
+            self.add(signature, self.map, offset)
+
+    def close(self):
+        self.map.close()
+        self.file.close()
+
+
+# ================================ Generation ================================
+
+INVALID, NO_MOVES, EXIT_DRAW, QUIET = 1, 2, 4, 8 # what scan finds out about each position
+
+def partPath(work, size, signature): # the size is in the name so parts for different boards can share a work directory
+    return os.path.join(work, f"{size[0]}x{size[1]}-" + "-".join(str(count) for count in signature) + ".bin")
+
+def openParts(work, geometry, done): # the finished parts, mapped the same way the final file is
+    parts = Tables(geometry)
+    for signature in done:
+        with open(partPath(work, geometry.size, signature), "rb") as file:
+            if os.path.getsize(file.name):
+                parts.add(signature, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ))
+    return parts
+
+def scan(size, work, done, signature, start, stop): # this runs in the worker processes
+    """finds the moves from positions start..stop-1 of a table, and returns what they tell us before anything in this table is solved"""
+    geometry = Geometry.get(size)
+    parts = openParts(work, geometry, done)
+    indexer = Indexer(geometry, signature)
+    board = Board.__new__(Board) # we set the position by hand, as setPosition would also find the moves and the hash
+    board.size = list(size)
+    board.geometry = geometry
+    board.history = []
+    board.hash = 0
+
+    flags = bytearray(stop - start) # see the bits below
+    pending = bytearray(stop - start) # how many moves stay in this table, and so aren't solved yet
+    exitWins = array("H", bytes(2 * (stop - start))) # the quickest win by a move that leaves the table, or 0
+    exitLosses = array("H", bytes(2 * (stop - start))) # the slowest loss by a move that leaves the table
+    for i in range(stop - start):
+        position = indexer.position(start + i)
+        if position is None:
+            flags[i] = INVALID
+            continue
+        board.white, board.black, board.kings, board.currentTeam = position
+        moves = board.generateMoves()
+        if not moves:
+            flags[i] = NO_MOVES
+            continue
+        quiet = 0
+        for move in moves:
+            board.makeMove(move)
+            if move.captured or signatureOf(board.white, board.black, board.kings) != signature: # a take or a crowning leaves the table
+                entry = parts.lookup(board.white, board.black, board.kings, board.currentTeam)
+                result, distance = decode(entry)
+                if result == LOSS: # they lose, so we win
+                    if not exitWins[i] or distance + 1 < exitWins[i]:
+                        exitWins[i] = distance + 1
+                elif result == WIN:
+                    exitLosses[i] = max(exitLosses[i], distance + 1)
+                else:
+                    flags[i] |= EXIT_DRAW
+            else:
+                quiet += 1
+            board.unmakeMove()
+        pending[i] = quiet
+        if quiet:
+            flags[i] |= QUIET
+    return start, bytes(flags), bytes(pending), exitWins.tobytes(), exitLosses.tobytes()
+
+def predecessors(geometry, indexer, white, black, kings, team):
+    """returns the numbers of the positions in this table that a quiet move (not a take or a crowning) leads here from"""
+    mover = -team # the team that just moved
+    own = white if mover == 1 else black
+    occupied = white | black
+    found = []
+    for square in bits(own):
+        king = kings >> square & 1
+        for d in range(4):
+            previous = geometry.neighbours[square][d]
+            if previous < 0 or occupied >> previous & 1:
+                continue
+            if not king and 3 - d not in geometry.forwards[mover]: # men can only have come from behind
+                continue
+            change = (1 << square) | (1 << previous)
+            if mover == 1:
+                position = (white ^ change, black, kings ^ change if king else kings, mover)
+            else:
+                position = (white, black ^ change, kings ^ change if king else kings, mover)
+            found.append(indexer.index(*position))
+    return found
+
+def solve(size, work, done, signature, workers, chunk=1 << 14, log=None):
+    """solves one table and returns its entries as an array of 16 bit numbers"""
+    geometry = Geometry.get(size)
+    indexer = Indexer(geometry, signature)
+    count = indexer.size
+    flags = bytearray(count)
+    pending = bytearray(count)
+    exitWins = array("H", bytes(2 * count))
+    exitLosses = array("H", bytes(2 * count))
+
+    # first every position's moves are found, which is most of the work, so it's shared between the workers
+    ranges = [(start, min(start + chunk, count)) for start in range(0, count, chunk)]
+    with ProcessPoolExecutor(workers) as executor:
+        futures = [executor.submit(scan, size, work, done, signature, start, stop) for start, stop in ranges]
+        for future in futures:
+            start, chunkFlags, chunkPending, chunkWins, chunkLosses = future.result()
+            stop = start + len(chunkFlags)
+            flags[start:stop] = chunkFlags
+            pending[start:stop] = chunkPending
+            exitWins[start:stop] = array("H", chunkWins)
+            exitLosses[start:stop] = array("H", chunkLosses)
+
+    # then we go backwards from the positions we know, one move at a time, so every position is solved with its shortest win
+    entries = array("H", bytes(2 * count))
+    solved = bytearray(count)
+    lossAt = array("H", exitLosses) # the slowest loss found so far, for when every move turns out to lose
+    wins = {} # moves -> positions that win in that many moves, if nothing quicker turns up
+    losses = {}
+    for index in range(count):
+        if flags[index] & INVALID:
+            solved[index] = 1
+        elif flags[index] & NO_MOVES:
+            losses.setdefault(0, []).append(index)
+        elif exitWins[index]:
+            wins.setdefault(exitWins[index], []).append(index)
+        elif not pending[index] and not flags[index] & EXIT_DRAW:
+            losses.setdefault(lossAt[index], []).append(index)
+
+    distance = 0
+    while wins or losses:
+        for result, bucket in ((LOSS, losses.pop(distance, [])), (WIN, wins.pop(distance, []))):
+            for index in bucket:
+                if solved[index]:
+                    continue
+                solved[index] = 1
+                entries[index] = distance | LOST if result == LOSS else distance
+                for previous in predecessors(geometry, indexer, *indexer.position(index)):
+                    if solved[previous] or not flags[previous] & QUIET:
+                        continue
+                    if result == LOSS: # moving here wins
+                        wins.setdefault(distance + 1, []).append(previous)
+                    else:
+                        pending[previous] -= 1
+                        lossAt[previous] = max(lossAt[previous], distance + 1)
+                        if not pending[previous] and not exitWins[previous] and not flags[previous] & EXIT_DRAW: # every move loses
+                            losses.setdefault(lossAt[previous], []).append(previous)
+        distance += 1
+    if log:
+        won = sum(1 for entry in entries if entry and not entry & LOST)
+        lost = sum(1 for entry in entries if entry & LOST)
+        log(f"{signature}: {count} positions, {won} won and {lost} lost, longest {distance - 1} moves")
+    return entries
+
+def generate(path, size=(10, 10), maxPieces=3, workers=None, work=None, log=print): # stopping and running it again carries on where it left off
+    """solves every table with up to maxPieces pieces and writes them to path"""
+    size = (size[0], size[1])
+    work = work or path + ".parts"
+    os.makedirs(work, exist_ok=True)
+    geometry = Geometry.get(size)
+    done = []
+    for signature in signatures(maxPieces):
+        part = partPath(work, size, signature)
+        expected = 2 * Indexer(geometry, signature).size
+        if os.path.exists(part) and os.path.getsize(part) != expected: # not something we finished, so it can't be trusted
+            if log:
+                log(f"{part} is the wrong size, solving it again")
+            os.remove(part)
+        if not os.path.exists(part): # each table is written to its own file first, so a finished table never has to be solved again
+            start = time.perf_counter()
+            entries = solve(size, work, done, signature, workers, log=log)
+            with open(part + ".tmp", "wb") as file:
+                file.write(entries.tobytes() if sys.byteorder == "little" else _swapped(entries))
+            os.replace(part + ".tmp", part)
+            if log:
+                log(f"{signature} took {time.perf_counter() - start:.1f}s")
+        done.append(signature)
+
+    # put all the parts together into one file with a directory at the front
+    offset = HEADER.size + ENTRY.size * len(done)
+    with open(path + ".tmp", "wb") as file:
+        file.write(HEADER.pack(MAGIC, VERSION, size[0], size[1], maxPieces, len(done)))
+        for signature in done:
+            length = os.path.getsize(partPath(work, size, signature))
+            file.write(ENTRY.pack(*signature, offset, length // 2))
+            offset += length
+        for signature in done:
+            with open(partPath(work, size, signature), "rb") as part:
+                while (data := part.read(1 << 20)):
+                    file.write(data)
+    os.replace(path + ".tmp", path)
+
+def _swapped(entries): # the file is always little-endian
+    copy = array("H", entries)
+    copy.byteswap()
+    return copy.tobytes()
+
+def bruteForce(size, maxPieces):
+    """returns {(white, black, kings, team): (result, moves)} for every position with up to maxPieces pieces, solved the slow way"""
+    geometry = Geometry.get(size)
+    board = Board.__new__(Board)
+    board.size = list(size)
+    board.geometry = geometry
+    board.history = []
+    board.hash = 0
+    # every position, found by putting pieces on squares rather than through Indexer, so the numbering gets checked too
+    children = {}
+    for count in range(2, maxPieces + 1):
+        for squares in combinations(range(geometry.squares), count):
+            for kinds in product(range(4), repeat=count): # white man, white king, black man, black king
+                white = black = kings = 0
+                for square, kind in zip(squares, kinds):
+                    if kind < 2:
+                        white |= 1 << square
+                    else:
+                        black |= 1 << square
+                    if kind & 1:
+                        kings |= 1 << square
+                if not white or not black or white & ~kings & geometry.kingRows[1] or black & ~kings & geometry.kingRows[-1]:
+                    continue
+                for team in (1, -1):
+                    board.white, board.black, board.kings, board.currentTeam = white, black, kings, team
+                    found = []
+                    for move in board.generateMoves():
+                        board.makeMove(move)
+                        found.append((board.white, board.black, board.kings, board.currentTeam))
+                        board.unmakeMove()
+                    children[(white, black, kings, team)] = found
+
+    # a position is lost in 0 if there's nothing to move; then each round finds everything won or lost in one more move
+    def value(position):
+        own = position[0] if position[3] == 1 else position[1]
+        return (LOSS, 0) if not own else values.get(position)
+    values = {position: (LOSS, 0) for position, found in children.items() if not found}
+    moves = 1
+    while True:
+        found = {}
+        for position, after in children.items():
+            if position in values:
+                continue
+            results = [value(child) for child in after]
+            if any(result == (LOSS, moves - 1) for result in results):
+                found[position] = (WIN, moves)
+            elif all(result is not None and result[0] == WIN for result in results) and max(result[1] for result in results) == moves - 1:
+                found[position] = (LOSS, moves)
+        if not found: # nothing at this distance means nothing further away either
+            break
+        values.update(found)
+        moves += 1
+    return {position: values.get(position, (DRAW, 0)) for position in children}
+
+def check(size=(6, 6), maxPieces=3, workers=None, out=print): # the tablebase version of perft --check, run it after changing anything in here
+    """generates a small tablebase and compares every position in it with bruteForce, and returns how many were wrong"""
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "check.bin")
+        generate(path, size, maxPieces, workers, log=None)
+        tablebase = Tablebase(path)
+        try:
+            expected = bruteForce(size, maxPieces)
+            failures = 0
+            board = Board.__new__(Board)
+            for (white, black, kings, team), answer in expected.items():
+                board.white, board.black, board.kings, board.currentTeam = white, black, kings, team
+                found = tablebase.probe(board)
+                if found != answer:
+                    failures += 1
+                    if failures <= 10:
+                        out(f"{Board.fen(board)}: tablebase says {found}, expected {answer}")
+            out(f"{len(expected)} positions on {size[0]}x{size[1]} with up to {maxPieces} pieces, {failures} wrong")
+        finally:
+            tablebase.close()
+    return failures
+
+def main(arguments=None): # python -m draughts.tablebase
+    parser = argparse.ArgumentParser(description="make or look things up in an endgame tablebase")
+    commands = parser.add_subparsers(dest="command", required=True)
+    make = commands.add_parser("generate", help="solve every position with up to --pieces pieces")
+    make.add_argument("path")
+    make.add_argument("--pieces", type=int, default=3)
+    make.add_argument("--size", type=int, nargs=2, default=[10, 10], metavar=("WIDTH", "HEIGHT"))
+    make.add_argument("--workers", type=int, default=None, help="worker processes (default: one per core)")
+    make.add_argument("--work", default=None, help="where to keep finished tables until the end (default: PATH.parts)")
+    look = commands.add_parser("probe", help="look up a position")
+    look.add_argument("path")
+    look.add_argument("fen")
+    test = commands.add_parser("check", help="make a small tablebase and check every position against a slow brute-force solve")
+    test.add_argument("--pieces", type=int, default=3)
+    test.add_argument("--size", type=int, nargs=2, default=[6, 6], metavar=("WIDTH", "HEIGHT"))
+    test.add_argument("--workers", type=int, default=None, help="worker processes (default: one per core)")
+    options = parser.parse_args(arguments)
+
+    if options.command == "generate":
+        generate(options.path, options.size, options.pieces, options.workers, options.work)
+    elif options.command == "check":
+        return 1 if check(tuple(options.size), options.pieces, options.workers) else 0
+    else:
+        tablebase = Tablebase(options.path)
+        board = Board.fromFen(options.fen, tablebase.geometry.size)
+        found = tablebase.probe(board)
+        if found is None:
+            print("not in the tablebase")
+        else:
+            result, moves = found
+            print({WIN: f"win in {moves}", LOSS: f"loss in {moves}", DRAW: "draw"}[result])
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,47 @@
+# runs the engine in a thread so whatever is waiting for it (the window) doesn't freeze while it thinks
+
+import threading
+
+from .search import Engine
+
+
+class SearchWorker: # there is only ever one search going; a new one cancels the old one
+    """runs searches in a background thread and hands their results back through schedule"""
+    def __init__(self, schedule=None, tableSize=1 << 18, tablebase=None):
+        # schedule(function, *arguments) has to call function on the thread that wants the results, for GTK that's GLib.idle_add
+        self.schedule = schedule or (lambda function, *arguments: function(*arguments))
+        self.engine = Engine(tableSize, tablebase=tablebase)
+        self.thread = None
+        self.job = 0 # which search is current, so results from one that was cancelled can be thrown away
+
+    @property
+    def busy(self):
+        return self.thread is not None and self.thread.is_alive()
+
+    def submit(self, board, seconds=1.0, progress=None, done=None, maxDepth=64):
+        """cancels any search that's running and starts searching a copy of board; progress gets a SearchResult after each depth and done gets the last one"""
+        self.cancel()
+        self.job += 1
+        self.thread = threading.Thread(target=self.run, args=(self.job, board.copy(), seconds, maxDepth, progress, done), daemon=True)
+        self.thread.start()
+        return self.job
+
+    def cancel(self): # the engine checks for this every few hundred nodes, so we don't wait long
+        """stops the current search, if there is one; its results never get delivered"""
+        self.job += 1
+        if self.thread is not None:
+            self.engine.stop()
+            self.thread.join()
+            self.engine.stopped.clear() # in case the search had already finished and didn't see it
+            self.thread = None
+
+    def run(self, job, board, seconds, maxDepth, progress, done): # this is the only part that runs in the other thread
+        info = (lambda result: self.schedule(self.deliver, job, progress, result)) if progress else None
+        result = self.engine.search(board, seconds, maxDepth, info=info)
+        if done:
+            self.schedule(self.deliver, job, done, result)
+
+    def deliver(self, job, callback, result): # this runs back on the caller's thread
+        if job == self.job: # otherwise the position has changed since, and nobody wants it
+            callback(result)
+        return False # so GLib.idle_add only calls us once